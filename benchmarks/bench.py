@@ -0,0 +1,194 @@
+"""
+Measures decode and encode throughput of the messages and the round trip
+performance against the local stand-in server.
+
+Results are printed as JSON (or written to --output) so they can be compared
+between releases.
+"""
+# For the case that nl2telemetry has not been added to PYTHONPATH
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).absolute().parent.parent))
+
+import argparse
+import contextlib
+import json
+import platform
+import time
+import timeit
+
+from nl2telemetry import NoLimits2, message
+from nl2telemetry.message import Answer, reply
+from nl2telemetry.message.reply import TelemetryData
+from nl2telemetry.pipeline import PipelinedTransmitter
+from nl2telemetry.server import StandInServer, encode_reply
+
+sample_payloads = {
+    1: b'',
+    2: b'some error text',
+    4: reply.VersionData.packer.pack(2, 5, 6, 0),
+    6: TelemetryData.packer.pack(
+        1, 12345, 1, 0, 0, 0, 0, 0, 20.0, 1.0, 2.0, 3.0, 0.0, 0.7, 0.0, 0.7,
+        0.5, 1.0, 0.1
+    ),
+    8: reply.IntValueData.packer.pack(3),
+    10: b'Some Coaster',
+    12: reply.IntValuePairData.packer.pack(1, 2),
+    15: reply.StationStateData.packer.pack(0x1abc),
+}
+
+encoders = {
+    'idle': (message.idle, None),
+    'get version': (message.get_version, None),
+    'get telemetry': (message.get_telemetry, None),
+    'get coaster count': (message.get_coaster_count, None),
+    'get current coaster and nearest station': (
+        message.get_current_coaster_and_nearest_station, None
+    ),
+    'get coaster name': (
+        message.get_coaster_name,
+        lambda msg: msg.set_coaster_index(1)
+    ),
+    'set emergency stop': (
+        message.set_emergency_stop,
+        lambda msg: msg.set_emergency_for(1, 1)
+    ),
+    'get station state': (
+        message.get_station_state,
+        lambda msg: msg.get_state_for(1, 0)
+    ),
+    'set manual mode': (
+        message.set_manual_mode,
+        lambda msg: msg.set_manual_for(1, 0, 1)
+    ),
+    'dispatch': (message.dispatch, lambda msg: msg.set_for(1, 0)),
+    'set gates': (message.set_gates, lambda msg: msg.set_gates_for(1, 0, 1)),
+    'set harness': (
+        message.set_harness,
+        lambda msg: msg.set_harness_for(1, 0, 1)
+    ),
+    'set platform': (
+        message.set_platform,
+        lambda msg: msg.set_platform_for(1, 0, 1)
+    ),
+    'set flyer car': (
+        message.set_flyer_car,
+        lambda msg: msg.set_flyer_car_for(1, 0, 1)
+    ),
+    'set pause': (message.set_pause, lambda msg: msg.set_pause_to_enabled()),
+    'select seat': (
+        message.select_seat,
+        lambda msg: msg.set_to_seat(1, 0, 0, 0)
+    ),
+    'recenter VR': (message.recenter_vr, None),
+    'set custom view': (
+        message.set_custom_view,
+        lambda msg: msg.set_fly_view(1.0, 2.0, 3.0, 0.5, 0.1)
+    ),
+}
+
+
+def measure(function, number):
+    best = min(timeit.repeat(function, number=number, repeat=5))
+    return {
+        'ns_per_op': best / number * 1e9,
+        'ops_per_sec': number / best,
+    }
+
+
+def bench_decode(number):
+    results = {}
+    for type_id, payload in sorted(sample_payloads.items()):
+        frame = memoryview(bytearray(encode_reply(type_id, 7, payload)))
+        name = reply.data_types[type_id].data_name
+        results[name] = measure(lambda: Answer.build(frame), number)
+    return results
+
+
+def bench_encode(number):
+    results = {}
+    for name, (msg, set_data) in encoders.items():
+        if set_data is None:
+            def encode(msg=msg):
+                msg.set_request_id(7)
+        else:
+            def encode(msg=msg, set_data=set_data):
+                set_data(msg)
+                msg.set_request_id(7)
+        results[name] = measure(encode, number)
+    return results
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    result = {}
+    for percentile in (50, 90, 99, 99.9):
+        index = min(len(latencies) - 1,
+                    int(len(latencies) * percentile / 100))
+        result['p{}_us'.format(percentile)] = latencies[index] * 1e6
+    result['max_us'] = latencies[-1] * 1e6
+    return result
+
+
+def bench_round_trip(count, depth):
+    request = message.request.GetTelemetryMessage()
+    # keeps the connection messages of the transmitter out of the results
+    with contextlib.redirect_stdout(sys.stderr), \
+            StandInServer('127.0.0.1', 0) as server, \
+            NoLimits2('127.0.0.1', server.port) as nl2:
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(count):
+            sent = time.perf_counter()
+            nl2.send(request)
+            Answer.get_data(nl2.receive())
+            latencies.append(time.perf_counter() - sent)
+        sequential = time.perf_counter() - start
+
+        pipeline = PipelinedTransmitter(nl2, depth)
+        start = time.perf_counter()
+        for _ in range(count):
+            pipeline.submit(request)
+        pipeline.flush()
+        pipelined = time.perf_counter() - start
+
+    result = {
+        'requests': count,
+        'sequential_requests_per_sec': count / sequential,
+        'pipelined_depth': depth,
+        'pipelined_requests_per_sec': count / pipelined,
+    }
+    result.update(percentiles(latencies))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=100000,
+                        help="operations per decode/encode measurement")
+    parser.add_argument('--requests', type=int, default=5000,
+                        help="requests per round trip measurement")
+    parser.add_argument('--depth', type=int, default=8,
+                        help="requests in flight when pipelining")
+    parser.add_argument('--output', help="write the results to this file")
+    arguments = parser.parse_args()
+
+    results = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'decode': bench_decode(arguments.number),
+        'encode': bench_encode(arguments.number),
+        'round_trip': bench_round_trip(arguments.requests, arguments.depth),
+    }
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if arguments.output is None:
+        print(output)
+    else:
+        with open(arguments.output, 'w') as file_handle:
+            file_handle.write(output)
+
+
+if __name__ == '__main__':
+    main()
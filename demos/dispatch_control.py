@@ -12,14 +12,11 @@ Launch NoLimits 2 with the "--telemetry" option, then execute.
 import tkinter as tk
 from typing import Union
 
-from nl2telemetry.message import Answer
 from nl2telemetry.message.request import SetEmergencyStopMessage, \
     SetManualModeMessage, SetGatesMessage, SetHarnessMessage, \
-    SetFlyerCarMessage, SetPlatformMessage, DispatchMessage, \
-    GetStationStateMessage, GetCurrentCoasterAndNearestStationMessage, \
-    GetCoasterNameMessage
-from nl2telemetry.message.reply import StationStateData, IntValuePairData, \
-    StringData
+    SetFlyerCarMessage, SetPlatformMessage, DispatchMessage
+from nl2telemetry.metadata import CoasterMetadata
+from nl2telemetry.stations import StationWatcher
 
 from nl2telemetry import NoLimits2
 
@@ -167,15 +164,15 @@ class Nl2Station:
     from nl2telemetry.transmitter import TcpTransmitter
     sent_request = 0
 
-    def __init__(self, nl2: TcpTransmitter):
+    def __init__(self, nl2: TcpTransmitter, metadata: CoasterMetadata):
         self._latest_status = None
+        self._metadata = metadata
 
-        self._coaster_id = 0
+        self._coaster_id = None
         self._coaster_name = ""
-        self._station_id = 0
+        self._station_id = None
 
-        self._coaster_name_request = GetCoasterNameMessage()
-        self._status_request = GetStationStateMessage()
+        self._watcher = StationWatcher(nl2)
         self._emergency_request = SetEmergencyStopMessage()
         self._manual_request = SetManualModeMessage()
         self._gates_request = SetGatesMessage()
@@ -202,22 +199,25 @@ class Nl2Station:
         return self._station_id
 
     def _update_coaster_name(self):
-        self._coaster_name_request.set_coaster_index(self._coaster_id)
-        self._nl2.send(self._coaster_name_request)
-        data = Answer.get_data(self._nl2.receive())
-        if isinstance(data, StringData):
-            self._latest_status = data
-            self._coaster_name = data.value
-
-    def update_status(self):
-        self._nl2.send(self._status_request)
-        data = Answer.get_data(self._nl2.receive())
-        if isinstance(data, StationStateData):
-            self._latest_status = data
+        name = self._metadata.coaster_name(self._coaster_id)
+        if name is not None:
+            self._coaster_name = name
+
+    def update_status(self) -> list:
+        """returns the flags that changed since the last update"""
+        changes = self._watcher.poll()
+        self._latest_status = self._watcher.states.get(
+            (self._coaster_id, self._station_id)
+        )
+        return changes
 
     def set_to_station(self, coaster_id, station_id):
+        if (coaster_id, station_id) == (self._coaster_id, self._station_id):
+            return
+        self._watcher.unwatch(self._coaster_id, self._station_id)
         self._coaster_id = coaster_id
         self._station_id = station_id
+        self._watcher.watch(coaster_id, station_id)
         self._update_coaster_name()
 
     def toggle_emergency(self):
@@ -325,11 +325,11 @@ def run(update_interval=250):
     root = tk.Tk()
     app = Application(root)
     app.pack(side="top", fill="both", expand=True)
-    update_request = GetCurrentCoasterAndNearestStationMessage()
     update_interval = 500
 
     with NoLimits2() as nl2:
-        closest_station = Nl2Station(nl2)
+        metadata = CoasterMetadata(nl2, station_ttl=update_interval / 1000)
+        closest_station = Nl2Station(nl2, metadata)
 
         app.bind_commands(
             emergency=closest_station.toggle_emergency,
@@ -342,13 +342,12 @@ def run(update_interval=250):
         )
 
         def update_station():
-            nl2.send(update_request)
-            data = Answer.get_data(nl2.receive())
-            if isinstance(data, IntValuePairData):
-                closest_station.set_to_station(data.value0, data.value1)
-            closest_station.update_status()
+            nearest = metadata.current_coaster_and_station()
+            if nearest is not None:
+                closest_station.set_to_station(*nearest)
+            changes = closest_station.update_status()
             status = closest_station.latest_status
-            if status is not None:
+            if changes and status is not None:
                 app.set_status(
                     closest_station.coaster_name,
                     str(closest_station.station_id),
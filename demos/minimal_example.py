@@ -16,4 +16,4 @@ from nl2telemetry.message import get_telemetry, Answer
 with NoLimits2() as nl2:
     nl2.send(get_telemetry)
     data = Answer.get_data(nl2.receive())
-    pprint(data.__dict__)
+    pprint(data._asdict())
@@ -7,6 +7,9 @@ sys.path.append(str(pathlib.Path(__file__).absolute().parent.parent))
 """
 Writes NL2 Telemetry Data into CSV files.
 
+The data is streamed into the CSV file and into a binary recording (.nl2rec)
+next to it by a background writer while the simulation runs.
+
 To get a reasonable amount of clean data it is recommended to limit NL2's
 frame rate to for example 10 per second before running the simulation.
 
@@ -14,59 +17,36 @@ Launch NoLimits 2 with the "--telemetry" option, then execute.
 """
 
 import pathlib
-import csv
+import time
 import tkinter
 from tkinter import filedialog
 
 from nl2telemetry.message import Answer, get_telemetry
 from nl2telemetry.message.reply import ErrorData, TelemetryData
 from nl2telemetry import NoLimits2
+from nl2telemetry.dedup import FrameDeduplicator
+from nl2telemetry.export import ExportWriter, CsvSink, RecordingSink
+from nl2telemetry.sampler import Sample
 
 
-def save_collected_data(collected_data, save_file):
-    save_file = pathlib.Path(save_file).with_suffix('.csv')
-    print("saving as", save_file)
-    with open(save_file, 'w', newline='') as file_handle:
-        writer = csv.writer(file_handle, quoting=csv.QUOTE_NONNUMERIC)
-        writer.writerow(
-            (
-                "record_number",
-                "position_x",
-                "position_y",
-                "position_z",
-                "rotation_quaternion_x",
-                "rotation_quaternion_y",
-                "rotation_quaternion_z",
-                "rotation_quaternion_w",
-                "speed",
-                "gforce_x",
-                "gforce_y",
-                "gforce_z"
-            )
-        )
-        for entry in collected_data:
-            writer.writerow(entry)
-    print("Saved! Bye and have a nice day!")
-
-
-def new_data(data):
-    no_pause = not data.paused_state
-    new_frame = data.rendered_frame > new_data.last_rendered_frame
-    position = data.position_x, data.position_z, data.position_z
-    new_position = position != new_data.last_position
+def print_status(status, writer):
+    if status != print_status.last_status:
+        if print_status.last_status is not None:
+            print("")
+        print_status.last_status = status
+        print_status.last_time = 0
+    now = time.monotonic()
+    if now - print_status.last_time >= 1:
+        print_status.last_time = now
+        print("\r{} ({} records)".format(status, writer.written), end='')
 
-    new_data.last_position = position
-    new_data.last_rendered_frame = data.rendered_frame
 
-    return no_pause and new_frame and new_position
+print_status.last_status = None
+print_status.last_time = 0
 
 
-new_data.last_position = 0, 0, 0
-new_data.last_rendered_frame = 0
-
-
-def collect_loop(collected_data, has_received_data, record_number,
-                 nl2):
+def collect_loop(writer, has_received_data, record_number, nl2):
+    dedup = FrameDeduplicator()
     while True:
         get_telemetry.set_request_id(record_number)
         nl2.send(get_telemetry)
@@ -74,32 +54,17 @@ def collect_loop(collected_data, has_received_data, record_number,
 
         if isinstance(data, TelemetryData):
             if data.in_play_mode:
-                if not has_received_data:
-                    print("")
-                    has_received_data = True
-                print("\rcollecting data", end='')
+                has_received_data = True
+                print_status("collecting data", writer)
 
             elif has_received_data:
                 raise KeyboardInterrupt()
 
             else:
-                print("\rwaiting for simulation start", end='')
-
-            if new_data(data):
-                collected_data.append((
-                    record_number,
-                    data.position_x,
-                    data.position_y,
-                    data.position_z,
-                    data.rotation_quaternion_x,
-                    data.rotation_quaternion_y,
-                    data.rotation_quaternion_z,
-                    data.rotation_quaternion_w,
-                    data.speed,
-                    data.gforce_x,
-                    data.gforce_y,
-                    data.gforce_z,
-                ))
+                print_status("waiting for simulation start", writer)
+
+            if dedup.accept(data):
+                writer.put(Sample(time.monotonic(), data))
                 record_number += 1
 
         elif isinstance(data, ErrorData):
@@ -107,21 +72,25 @@ def collect_loop(collected_data, has_received_data, record_number,
                 raise KeyboardInterrupt()
 
 
-def collect_data():
-    collected_data = []
-    with NoLimits2('127.0.0.1', 15151) as nl2:
+def collect_data(save_file):
+    save_file = pathlib.Path(save_file).with_suffix('.csv')
+    recording_file = save_file.with_suffix('.nl2rec')
+    if recording_file.exists():
+        recording_file.unlink()
+    print("saving as", save_file)
+
+    writer = ExportWriter(CsvSink(save_file), RecordingSink(recording_file))
+    with NoLimits2('127.0.0.1', 15151) as nl2, writer:
         record_number = 0
         has_received_data = False
         try:
-            collect_loop(collected_data, has_received_data, record_number,
-                         nl2)
+            collect_loop(writer, has_received_data, record_number, nl2)
 
         except KeyboardInterrupt:
             print("\nStopped")
 
         except Exception as e:
             print("\nAn error occurred:\n", e)
-    return collected_data
 
 
 def query_save_location():
@@ -146,11 +115,11 @@ def run():
     print("Selected file", save_file)
 
     try:
-        collected_data = collect_data()
+        collect_data(save_file)
     except Exception as e:
         print("An error occurred:\n", e)
     else:
-        save_collected_data(collected_data, save_file)
+        print("Saved! Bye and have a nice day!")
 
 
 if __name__ == '__main__':
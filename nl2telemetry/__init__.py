@@ -1,2 +1,9 @@
 import nl2telemetry.transmitter
-NoLimits2 = nl2telemetry.transmitter.TcpTransmitter
\ No newline at end of file
+NoLimits2 = nl2telemetry.transmitter.TcpTransmitter
+
+try:
+    import nl2telemetry.aio
+except AttributeError:  # asyncio before Python 3.7
+    pass
+else:
+    AsyncNoLimits2 = nl2telemetry.aio.AsyncTcpTransmitter
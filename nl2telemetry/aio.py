@@ -0,0 +1,127 @@
+"""
+An asyncio based counterpart of the TcpTransmitter
+"""
+import asyncio
+
+from .framing import FrameReader
+from .message.request import Message
+from .transmitter import TcpTransmitter, _buffer_of
+
+
+class _FrameProtocol(asyncio.BufferedProtocol):
+    def __init__(self, transmitter: 'AsyncTcpTransmitter'):
+        self._transmitter = transmitter
+        self._reader = FrameReader()
+
+    def get_buffer(self, sizehint):
+        return self._reader.writable()
+
+    def buffer_updated(self, nbytes):
+        self._reader.commit(nbytes)
+        frame = self._reader.next_frame()
+        while frame is not None:
+            self._transmitter._dispatch(frame)
+            frame = self._reader.next_frame()
+
+    def connection_lost(self, exc):
+        self._transmitter._connection_lost(exc)
+
+
+class AsyncTcpTransmitter:
+    """
+    Connects to the telemetry server of NL2 without blocking the event loop.
+
+    send() and receive() behave like the ones of TcpTransmitter, receive()
+    has to be awaited though and returns a copy of the reply bytes. request()
+    sends a copy of a message or an encoded request with a fresh request id
+    and returns exactly the reply to it, so several coroutines can share one
+    connection. Replies that do not
+    belong to a request() call are passed on to receive().
+    """
+    request_id_packer = TcpTransmitter.request_id_packer
+    _stamp = TcpTransmitter._stamp
+
+    def __init__(self, tcp_ip='127.0.0.1', tcp_port=15151, timeout=3):
+        self.tcp_ip = tcp_ip
+        self.tcp_port = tcp_port
+        self.timeout = timeout
+        self._transport = None
+        self._replies = None
+        self._pending = {}
+        self._next_request_id = 1
+        self._closed = None
+
+    async def connect(self):
+        ip_port_msg = "{}:{}".format(self.tcp_ip, self.tcp_port)
+        print("NL2 transmitter connecting to", ip_port_msg)
+
+        loop = asyncio.get_running_loop()
+        self._closed = loop.create_future()
+        self._replies = asyncio.Queue()
+        self._transport, _ = await asyncio.wait_for(
+            loop.create_connection(
+                lambda: _FrameProtocol(self), self.tcp_ip, self.tcp_port
+            ),
+            self.timeout
+        )
+
+    def send(self, msg):
+        """sends a request message or an already encoded request (see
+        nl2telemetry.message.encode)"""
+        msg = _buffer_of(msg)
+        # the buffer may be reused by the caller before the transport has
+        # written all of it
+        self._transport.write(msg if isinstance(msg, bytes) else bytes(msg))
+
+    async def receive(self) -> bytes:
+        reply = await self._replies.get()
+        if isinstance(reply, Exception):
+            self._replies.put_nowait(reply)
+            raise reply
+        return reply
+
+    async def request(self, msg) -> bytes:
+        if self._closed is None or self._closed.done():
+            raise ConnectionError("not connected to NL2")
+        (request_id, buffer) = self._stamp(msg)
+        reply = asyncio.get_running_loop().create_future()
+        try:
+            self._pending[request_id] = reply
+            self.send(buffer)
+            return await reply
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            await self._closed
+            self._transport = None
+            print("connection closed")
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _dispatch(self, frame):
+        (_, request_id, _) = Message.head_packer.unpack_from(frame, 1)
+        reply = self._pending.pop(request_id, None)
+        if reply is None:
+            self._replies.put_nowait(bytes(frame))
+        elif not reply.done():
+            reply.set_result(bytes(frame))
+
+    def _connection_lost(self, exc):
+        error = ConnectionError("connection to NL2 lost")
+        if exc is not None:
+            error.__cause__ = exc
+        for reply in self._pending.values():
+            if not reply.done():
+                reply.set_exception(error)
+        self._pending.clear()
+        self._replies.put_nowait(error)
+        if not self._closed.done():
+            self._closed.set_result(None)
@@ -0,0 +1,110 @@
+"""
+Derived kinematics of recorded telemetry computed with NumPy (requires numpy)
+
+Every function takes telemetry as anything indexable by field name: the
+structured arrays of RecordingReader.to_numpy() and batch.decode_telemetry(),
+or a dict of ColumnarReader.load_numpy() channels. Derivatives use the
+sample timestamps, which must be strictly increasing (see dedup for dropping
+repeated frames).
+"""
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+kinematics_fields = (
+    'yaw', 'pitch', 'roll', 'gforce', 'jerk_x', 'jerk_y', 'jerk_z',
+    'distance',
+)
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("telemetry analysis requires numpy")
+
+
+def _column(telemetry, name):
+    return numpy.asarray(telemetry[name], dtype=numpy.float64)
+
+
+def _timestamps(telemetry, timestamps):
+    if timestamps is None:
+        timestamps = telemetry['timestamp']
+    timestamps = numpy.asarray(timestamps, dtype=numpy.float64)
+    if numpy.any(numpy.diff(timestamps) <= 0):
+        raise ValueError("timestamps are not strictly increasing")
+    return timestamps
+
+
+def euler_angles(telemetry):
+    """
+    yaw (about the vertical y axis), pitch (about x) and roll (about z) in
+    radians, applied in this order, from the rotation quaternions
+    """
+    _require_numpy()
+    x = _column(telemetry, 'rotation_quaternion_x')
+    y = _column(telemetry, 'rotation_quaternion_y')
+    z = _column(telemetry, 'rotation_quaternion_z')
+    w = _column(telemetry, 'rotation_quaternion_w')
+    yaw = numpy.arctan2(2 * (x * z + w * y), 1 - 2 * (x * x + y * y))
+    pitch = numpy.arcsin(numpy.clip(2 * (w * x - y * z), -1.0, 1.0))
+    roll = numpy.arctan2(2 * (x * y + w * z), 1 - 2 * (x * x + z * z))
+    return yaw, pitch, roll
+
+
+def gforce_magnitude(telemetry):
+    """the length of the g-force vector in g"""
+    _require_numpy()
+    return numpy.sqrt(
+        _column(telemetry, 'gforce_x') ** 2
+        + _column(telemetry, 'gforce_y') ** 2
+        + _column(telemetry, 'gforce_z') ** 2
+    )
+
+
+def jerk(telemetry, timestamps=None):
+    """the derivatives of gforce_x, gforce_y and gforce_z in g per second,
+    timestamps default to the timestamp field"""
+    _require_numpy()
+    timestamps = _timestamps(telemetry, timestamps)
+    if len(timestamps) < 2:
+        return tuple(numpy.zeros(len(timestamps)) for _ in range(3))
+    return tuple(
+        numpy.gradient(_column(telemetry, name), timestamps)
+        for name in ('gforce_x', 'gforce_y', 'gforce_z')
+    )
+
+
+def path_length(telemetry):
+    """the distance travelled up to each sample in meters"""
+    _require_numpy()
+    positions = numpy.stack([
+        _column(telemetry, 'position_x'),
+        _column(telemetry, 'position_y'),
+        _column(telemetry, 'position_z'),
+    ], axis=1)
+    distance = numpy.zeros(len(positions))
+    numpy.cumsum(
+        numpy.linalg.norm(numpy.diff(positions, axis=0), axis=1),
+        out=distance[1:]
+    )
+    return distance
+
+
+def kinematics(telemetry, timestamps=None):
+    """a structured array with one row per sample and the kinematics_fields"""
+    _require_numpy()
+    yaw, pitch, roll = euler_angles(telemetry)
+    jerk_x, jerk_y, jerk_z = jerk(telemetry, timestamps)
+    result = numpy.empty(len(yaw), dtype=[
+        (name, 'f8') for name in kinematics_fields
+    ])
+    result['yaw'] = yaw
+    result['pitch'] = pitch
+    result['roll'] = roll
+    result['gforce'] = gforce_magnitude(telemetry)
+    result['jerk_x'] = jerk_x
+    result['jerk_y'] = jerk_y
+    result['jerk_z'] = jerk_z
+    result['distance'] = path_length(telemetry)
+    return result
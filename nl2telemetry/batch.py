@@ -0,0 +1,133 @@
+"""
+Decodes many telemetry replies at once into NumPy structured arrays (requires
+numpy)
+"""
+import struct
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from .message import reply
+from .message.reply import TelemetryData
+from .message.request import Message
+
+_numpy_types = {
+    'b': 'i1',
+    'i': 'i4',
+    'I': 'u4',
+    'f': 'f4',
+}
+
+_frame_head_packer = struct.Struct('!cHIH')
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("decoding batches requires numpy")
+
+
+def payload_dtype(data_type=TelemetryData):
+    """the big-endian dtype mirroring data_type.data_format"""
+    _require_numpy()
+    return numpy.dtype([
+        (name, '>' + _numpy_types[code])
+        for name, code in zip(data_type._fields, data_type.data_format[1:])
+    ])
+
+
+def telemetry_dtype():
+    """the dtype of decoded telemetry: the payload fields without the raw
+    state followed by one boolean column per state flag"""
+    payload = payload_dtype(TelemetryData)
+    return numpy.dtype(
+        [(name, payload[name]) for name in payload.names if name != 'state']
+        + [(name, '?') for name in TelemetryData.flag_names]
+    )
+
+
+def _frame_dtype(payload):
+    return numpy.dtype([
+        ('magic_start', 'S1'),
+        ('type_id', '>u2'),
+        ('request_id', '>u4'),
+        ('data_size', '>u2'),
+        ('data', payload),
+        ('magic_end', 'S1'),
+    ])
+
+
+def _frame_offsets(buffer, type_id, data_size):
+    """offsets of all complete messages with type_id in buffer, a partial
+    message at the end is ignored"""
+    offsets = []
+    offset = 0
+    length = len(buffer)
+    while offset + 10 <= length:
+        (magic, frame_type, _, size) = _frame_head_packer.unpack_from(
+            buffer, offset
+        )
+        if magic != Message.magic_start:
+            raise ValueError("no message start at offset {}".format(offset))
+        end = offset + 9 + size
+        if end >= length:
+            break
+        if buffer[end] != Message._magic_end_byte:
+            raise ValueError("no message end at offset {}".format(end))
+        if frame_type == type_id and size == data_size:
+            offsets.append(offset)
+        offset += 10 + size
+    return offsets
+
+
+def decode_payloads(buffer, data_type=TelemetryData):
+    """
+    Decodes a contiguous buffer of framed replies into a structured array of
+    the raw, big-endian payloads. Replies of other types (e.g. errors) are
+    skipped.
+    """
+    _require_numpy()
+    payload = payload_dtype(data_type)
+    frame = _frame_dtype(payload)
+    type_id = next(
+        key for key, value in reply.data_types.items()
+        if value is data_type
+    )
+    raw = numpy.frombuffer(buffer, dtype=numpy.uint8)
+
+    if len(raw) % frame.itemsize == 0:
+        frames = raw.view(frame)
+        if len(frames) == 0 or (
+            numpy.all(frames['type_id'] == type_id)
+            and numpy.all(frames['magic_start'] == Message.magic_start)
+            and numpy.all(frames['magic_end'] == Message.magic_end)
+        ):
+            return frames['data']
+
+    offsets = numpy.array(
+        _frame_offsets(buffer, type_id, payload.itemsize), dtype=numpy.intp
+    )
+    rows = raw[offsets[:, None] + numpy.arange(frame.itemsize)]
+    return rows.reshape(-1).view(frame)['data']
+
+
+def decode_telemetry(buffer):
+    """
+    Decodes a contiguous buffer of framed telemetry replies into a structured
+    array of telemetry_dtype() with one row per reply.
+    """
+    payloads = decode_payloads(buffer, TelemetryData)
+    return telemetry_from_payloads(payloads)
+
+
+def telemetry_from_payloads(payloads):
+    """converts raw telemetry payloads into rows of telemetry_dtype()"""
+    result = numpy.empty(len(payloads), dtype=telemetry_dtype())
+    for name in payloads.dtype.names:
+        if name != 'state':
+            result[name] = payloads[name]
+    state = payloads['state']
+    for position, name in enumerate(TelemetryData.flag_names):
+        result[name] = (state & (1 << position)) != 0
+    return result
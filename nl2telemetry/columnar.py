@@ -0,0 +1,218 @@
+"""
+A columnar file layout for long telemetry sessions
+
+A session is a directory with one file per channel, i.e. per TelemetryData
+field plus the timestamp, each holding a contiguous little-endian array
+(float64 timestamps, float32 positions, quaternions and g-forces, int32
+frame counters and states). index.json describes the channels, chunks.jsonl
+gets a line per chunk of rows with the minimum and maximum of every channel
+appended, so readers can skip chunks and load single channels.
+"""
+import array
+import json
+import os
+import pathlib
+import sys
+
+from .message.reply import TelemetryData
+
+index_name = 'index.json'
+chunks_name = 'chunks.jsonl'
+format_version = 2
+
+_typecodes = {
+    'i': 'i',
+    'f': 'f',
+}
+_numpy_types = {
+    'd': '<f8',
+    'i': '<i4',
+    'f': '<f4',
+}
+
+
+def telemetry_channels():
+    """the channel names and array typecodes of telemetry"""
+    channels = [('timestamp', 'd')]
+    for name, code in zip(TelemetryData._fields,
+                          TelemetryData.data_format[1:]):
+        channels.append((name, _typecodes[code]))
+    return channels
+
+
+def _to_little_endian(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+class ColumnarSink:
+    """
+    Writes samples as columns, usable with export.ExportWriter.
+
+    Rows are grouped into chunks of chunk_rows rows regardless of how many
+    samples are written at once, the minima and maxima of a chunk are
+    appended to the chunk list once it is complete or the sink is closed.
+    """
+
+    def __init__(self, path, chunk_rows=4096):
+        self.path = pathlib.Path(path)
+        self.chunk_rows = chunk_rows
+        self.channels = telemetry_channels()
+        self.rows = 0
+        self._files = {}
+        self._chunks_file = None
+        self._chunk_row = 0
+        self._minimum = {}
+        self._maximum = {}
+
+    def open(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        for name, _ in self.channels:
+            self._files[name] = open(str(self.path / (name + '.bin')), 'wb')
+        self._chunks_file = open(str(self.path / chunks_name), 'w')
+        index = {
+            'version': format_version,
+            'chunk_rows': self.chunk_rows,
+            'channels': dict(self.channels),
+        }
+        temporary = self.path / (index_name + '.tmp')
+        with open(str(temporary), 'w') as file:
+            json.dump(index, file)
+        os.replace(str(temporary), str(self.path / index_name))
+
+    def write_chunk(self, samples):
+        columns = [[sample.time for sample in samples]]
+        columns.extend(zip(*(sample.data for sample in samples)))
+        for (name, typecode), column in zip(self.channels, columns):
+            values = _to_little_endian(array.array(typecode, column))
+            values.tofile(self._files[name])
+
+        start = 0
+        while start < len(samples):
+            pending = self.rows - self._chunk_row
+            stop = min(len(samples), start + self.chunk_rows - pending)
+            for (name, _), column in zip(self.channels, columns):
+                self._update_range(name, column[start:stop])
+            self.rows += stop - start
+            start = stop
+            if self.rows - self._chunk_row == self.chunk_rows:
+                self._end_chunk()
+
+    def _update_range(self, name, values):
+        minimum = min(values)
+        maximum = max(values)
+        if name not in self._minimum or minimum < self._minimum[name]:
+            self._minimum[name] = minimum
+        if name not in self._maximum or maximum > self._maximum[name]:
+            self._maximum[name] = maximum
+
+    def _end_chunk(self):
+        self._chunks_file.write(json.dumps({
+            'row': self._chunk_row,
+            'count': self.rows - self._chunk_row,
+            'min': self._minimum,
+            'max': self._maximum,
+        }) + '\n')
+        self._chunk_row = self.rows
+        self._minimum = {}
+        self._maximum = {}
+
+    def flush(self):
+        for file in self._files.values():
+            file.flush()
+        self._chunks_file.flush()
+
+    def close(self):
+        if self._files:
+            if self.rows > self._chunk_row:
+                self._end_chunk()
+            self.flush()
+            for file in self._files.values():
+                file.close()
+            self._chunks_file.close()
+            self._files = {}
+
+
+class ColumnarReader:
+    """
+    Reads single channels of a columnar session.
+
+    The rows present in every channel file are readable, so a session that
+    is still being written or was interrupted can be read as well. Rows of
+    an unfinished chunk are listed as a chunk without minima and maxima.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        with open(str(self.path / index_name)) as file:
+            index = json.load(file)
+        if index['version'] != format_version:
+            raise ValueError("unsupported columnar version {}".format(
+                index['version']
+            ))
+        self.channels = index['channels']
+        self.rows = min(
+            os.path.getsize(str(self.path / (name + '.bin')))
+            // array.array(typecode).itemsize
+            for name, typecode in self.channels.items()
+        )
+        self.chunks = []
+        with open(str(self.path / chunks_name)) as file:
+            for line in file:
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    # a line that is still being written
+                    break
+                if chunk['row'] + chunk['count'] > self.rows:
+                    break
+                self.chunks.append(chunk)
+        indexed = self.chunks[-1]['row'] + self.chunks[-1]['count'] \
+            if self.chunks else 0
+        if self.rows > indexed:
+            self.chunks.append({
+                'row': indexed,
+                'count': self.rows - indexed,
+                'min': None,
+                'max': None,
+            })
+
+    def __len__(self):
+        return self.rows
+
+    def chunks_within(self, channel, lower=None, upper=None):
+        """the chunks that may contain values of channel between lower and
+        upper"""
+        return [
+            chunk for chunk in self.chunks
+            if chunk['min'] is None
+            or ((lower is None or chunk['max'][channel] >= lower)
+                and (upper is None or chunk['min'][channel] <= upper))
+        ]
+
+    def load(self, channel, start=0, stop=None) -> array.array:
+        """reads the rows start to stop of channel"""
+        typecode = self.channels[channel]
+        stop = self.rows if stop is None else min(stop, self.rows)
+        values = array.array(typecode)
+        if stop > start:
+            with open(str(self.path / (channel + '.bin')), 'rb') as file:
+                file.seek(start * values.itemsize)
+                values.fromfile(file, stop - start)
+            _to_little_endian(values)
+        return values
+
+    def load_chunk(self, channel, chunk) -> array.array:
+        return self.load(channel, chunk['row'], chunk['row'] + chunk['count'])
+
+    def load_numpy(self, channel, start=0, stop=None):
+        """reads the rows start to stop of channel into a numpy array"""
+        import numpy
+
+        dtype = numpy.dtype(_numpy_types[self.channels[channel]])
+        stop = self.rows if stop is None else min(stop, self.rows)
+        return numpy.fromfile(
+            str(self.path / (channel + '.bin')), dtype=dtype,
+            count=max(stop - start, 0), offset=start * dtype.itemsize
+        )
@@ -0,0 +1,73 @@
+"""
+Filters repeated telemetry of the same rendered frame
+"""
+
+
+class FrameDeduplicator:
+    """
+    Passes the telemetry of every frame rendered by NL2 only once.
+
+    Polling faster than NL2 renders returns the same frame several times,
+    those duplicates are dropped. Paused telemetry is dropped as well unless
+    skip_paused is False. A rendered frame lower than the last one (e.g. after
+    loading a park) is treated as a restart of the frame counter.
+
+    duplicates counts dropped repetitions, skipped_frames counts frames that
+    were rendered but never seen, e.g. because polling was too slow.
+    """
+
+    def __init__(self, skip_paused=True):
+        self.skip_paused = skip_paused
+        self.last_rendered_frame = None
+        self.unique = 0
+        self.duplicates = 0
+        self.skipped_frames = 0
+        self.paused = 0
+        self.restarts = 0
+
+    def accept(self, data) -> bool:
+        """returns whether data is the first telemetry of a new frame"""
+        if self.skip_paused and data.paused_state:
+            self.paused += 1
+            return False
+
+        frame = data.rendered_frame
+        last = self.last_rendered_frame
+        if last is not None:
+            if frame == last:
+                self.duplicates += 1
+                return False
+            elif frame > last:
+                self.skipped_frames += frame - last - 1
+            else:
+                self.restarts += 1
+
+        self.last_rendered_frame = frame
+        self.unique += 1
+        return True
+
+    def filter(self, stream):
+        """yields the unique TelemetryData of stream"""
+        accept = self.accept
+        for data in stream:
+            if accept(data):
+                yield data
+
+    def filter_samples(self, stream):
+        """yields the unique samples of a stream of sampler.Sample"""
+        accept = self.accept
+        for sample in stream:
+            if accept(sample.data):
+                yield sample
+
+    def reset(self):
+        self.__init__(self.skip_paused)
+
+    def statistics(self):
+        return {
+            'unique': self.unique,
+            'duplicates': self.duplicates,
+            'skipped_frames': self.skipped_frames,
+            'paused': self.paused,
+            'restarts': self.restarts,
+        }
@@ -0,0 +1,176 @@
+"""
+Streams samples to files on a background thread
+"""
+import csv
+import pathlib
+import queue
+import threading
+import time
+
+from .message.reply import TelemetryData
+from .recording import Recorder
+
+csv_fields = (
+    "position_x",
+    "position_y",
+    "position_z",
+    "rotation_quaternion_x",
+    "rotation_quaternion_y",
+    "rotation_quaternion_z",
+    "rotation_quaternion_w",
+    "speed",
+    "gforce_x",
+    "gforce_y",
+    "gforce_z",
+)
+
+
+class CsvSink:
+    """
+    Writes a record number and the given fields of each sample as CSV.
+    """
+
+    def __init__(self, path, fields=csv_fields):
+        self.path = pathlib.Path(path)
+        self.fields = fields
+        self.record_number = 0
+        self._file = None
+        self._writer = None
+
+    def open(self):
+        self._file = open(self.path, 'w', newline='')
+        self._writer = csv.writer(self._file, quoting=csv.QUOTE_NONNUMERIC)
+        self._writer.writerow(("record_number",) + tuple(self.fields))
+
+    def write_chunk(self, samples):
+        fields = self.fields
+        first = self.record_number
+        self._writer.writerows(
+            (number,) + tuple(getattr(sample.data, name) for name in fields)
+            for number, sample in enumerate(samples, first)
+        )
+        self.record_number = first + len(samples)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RecordingSink:
+    """
+    Appends the samples to a binary recording (see nl2telemetry.recording).
+    """
+
+    def __init__(self, path, data_type=TelemetryData):
+        self.recorder = Recorder(path, data_type)
+
+    def open(self):
+        self.recorder.open()
+
+    def write_chunk(self, samples):
+        append = self.recorder.append_data
+        for sample in samples:
+            append(sample.time, sample.data)
+
+    def flush(self):
+        self.recorder.flush()
+
+    def close(self):
+        self.recorder.close()
+
+
+class ExportWriter:
+    """
+    Passes samples through a bounded queue to a writer thread, which collects
+    them until chunk_size samples arrived or flush_interval seconds passed
+    since the first one, then writes the chunk to every sink and flushes the
+    sinks.
+
+    Sinks provide open(), write_chunk(samples), flush() and close(). put()
+    blocks while the queue is full unless block is False, the sample is
+    dropped and counted then. Exceptions of the writer thread are re-raised
+    by close().
+    """
+
+    def __init__(self, *sinks, queue_size=4096, chunk_size=256,
+                 flush_interval=1.0):
+        self.sinks = sinks
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.exception = None
+        self._queue = queue.Queue(queue_size)
+        self._thread = None
+
+    def start(self):
+        for sink in self.sinks:
+            sink.open()
+        self._thread = threading.Thread(
+            target=self._run, name='nl2 export writer', daemon=True
+        )
+        self._thread.start()
+
+    def put(self, sample, block=True) -> bool:
+        if self.exception is not None:
+            raise self.exception
+        try:
+            self._queue.put(sample, block)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        for sink in self.sinks:
+            sink.close()
+        if self.exception is not None:
+            raise self.exception
+
+    def _run(self):
+        finished = False
+        while not finished:
+            sample = self._queue.get()
+            if sample is None:
+                return
+            chunk = [sample]
+            deadline = time.monotonic() + self.flush_interval
+            while len(chunk) < self.chunk_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    sample = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if sample is None:
+                    finished = True
+                    break
+                chunk.append(sample)
+            if self.exception is None:
+                self._write(chunk)
+
+    def _write(self, chunk):
+        try:
+            for sink in self.sinks:
+                sink.write_chunk(chunk)
+                sink.flush()
+        except Exception as e:
+            self.exception = e
+        else:
+            self.written += len(chunk)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,280 @@
+"""
+Polls the telemetry of many NL2 instances from a single thread
+"""
+import errno
+import selectors
+import socket
+import time
+from collections import namedtuple
+
+from .framing import FrameReader
+from .message.reply import TelemetryData
+from .message.request import Message, GetTelemetryMessage
+
+FleetSample = namedtuple('FleetSample', ('name', 'time', 'data'))
+FleetSample.__doc__ = """TelemetryData of the instance called name received
+at time (time.monotonic)"""
+
+
+class FleetMember:
+    """
+    The connection to and the statistics of a single NL2 instance.
+    """
+
+    def __init__(self, name, tcp_ip, tcp_port, rate):
+        self.name = name
+        self.tcp_ip = tcp_ip
+        self.tcp_port = tcp_port
+        self.rate = rate
+        self.sck = None
+        self.connected = False
+        self.next_time = 0.0
+        self.sent_time = None
+        self.overdue = False
+        self.exception = None
+
+        self.requests = 0
+        self.replies = 0
+        self.error_replies = 0
+        self.drops = 0
+        self.overruns = 0
+        self.disconnects = 0
+        self.connect_failures = 0
+        self.latency_sum = 0.0
+        self.latency_min = None
+        self.latency_max = None
+        self.latency_last = None
+
+        self._request = GetTelemetryMessage()
+        self._request_id = 0
+        self._unsent = None
+        self._reader = FrameReader()
+
+    def statistics(self):
+        return {
+            'connected': self.connected,
+            'requests': self.requests,
+            'replies': self.replies,
+            'error_replies': self.error_replies,
+            'drops': self.drops,
+            'overruns': self.overruns,
+            'disconnects': self.disconnects,
+            'connect_failures': self.connect_failures,
+            'exception': None if self.exception is None
+            else repr(self.exception),
+            'latency_mean': self.latency_sum / self.replies
+            if self.replies else None,
+            'latency_min': self.latency_min,
+            'latency_max': self.latency_max,
+            'latency_last': self.latency_last,
+        }
+
+    def _send_request(self, now):
+        self._request_id = (self._request_id + 1) & 0xFFFFFFFF
+        self._request.set_request_id(self._request_id)
+        buffer = self._request.buffer
+        sent = self.sck.send(buffer)
+        if sent < len(buffer):
+            # sent once the socket is writable again
+            self._unsent = memoryview(bytes(buffer))[sent:]
+        self.sent_time = now
+        self.requests += 1
+
+    def _send_unsent(self):
+        """sends the rest of a partially sent request, True once all of it
+        is sent"""
+        sent = self.sck.send(self._unsent)
+        self._unsent = self._unsent[sent:]
+        if len(self._unsent) == 0:
+            self._unsent = None
+            return True
+        return False
+
+    def _receive(self, samples):
+        size = self.sck.recv_into(self._reader.writable())
+        if size == 0:
+            raise ConnectionError("connection closed by NL2")
+        self._reader.commit(size)
+        frame = self._reader.next_frame()
+        while frame is not None:
+            now = time.monotonic()
+            msg = Message.build(frame)
+            if msg is not None and msg.request_id == self._request_id \
+                    and self.sent_time is not None:
+                self._add_latency(now - self.sent_time)
+                self.sent_time = None
+                if self.overdue:
+                    self.overdue = False
+                    self.next_time = now
+                if isinstance(msg.data_object, TelemetryData):
+                    samples.append(
+                        FleetSample(self.name, now, msg.data_object)
+                    )
+                else:
+                    self.error_replies += 1
+            frame = self._reader.next_frame()
+
+    def _add_latency(self, latency):
+        self.replies += 1
+        self.latency_sum += latency
+        self.latency_last = latency
+        if self.latency_min is None or latency < self.latency_min:
+            self.latency_min = latency
+        if self.latency_max is None or latency > self.latency_max:
+            self.latency_max = latency
+
+
+class FleetPoller:
+    """
+    Requests telemetry from several NL2 instances at their own rates using
+    non-blocking sockets and a single selector.
+
+    poll() runs the event loop once and returns the received samples, tagged
+    with the name of their instance, stream() yields them continuously. A
+    request without reply after timeout seconds counts as drop and is
+    replaced by a new one, a poll that is due while a request is still in
+    flight counts as overrun. Lost connections are retried after
+    reconnect_interval seconds.
+    """
+
+    def __init__(self, rate=60, timeout=1.0, reconnect_interval=5.0):
+        self.rate = rate
+        self.timeout = timeout
+        self.reconnect_interval = reconnect_interval
+        self.members = {}
+        self._selector = selectors.DefaultSelector()
+
+    def add(self, name, tcp_ip='127.0.0.1', tcp_port=15151, rate=None):
+        member = FleetMember(
+            name, tcp_ip, tcp_port, self.rate if rate is None else rate
+        )
+        self.members[name] = member
+        self._connect(member)
+        return member
+
+    def remove(self, name):
+        self._disconnect(self.members.pop(name), None, count=False)
+
+    def statistics(self):
+        return {name: member.statistics()
+                for name, member in self.members.items()}
+
+    def poll(self, max_wait=None):
+        """sends due requests, waits for replies until the next request is
+        due (at most max_wait seconds) and returns the received samples"""
+        now = time.monotonic()
+        deadline = now + (max_wait if max_wait is not None else 1.0)
+        for member in list(self.members.values()):
+            if member.next_time <= now:
+                self._due(member, now)
+            deadline = min(deadline, member.next_time)
+            if member.sent_time is not None:
+                deadline = min(deadline, member.sent_time + self.timeout)
+
+        samples = []
+        events = self._selector.select(max(0.0, deadline - time.monotonic()))
+        for key, mask in events:
+            member = key.data
+            try:
+                if not member.connected:
+                    self._finish_connect(member)
+                    continue
+                if mask & selectors.EVENT_WRITE and member._send_unsent():
+                    self._selector.modify(
+                        member.sck, selectors.EVENT_READ, member
+                    )
+                if mask & selectors.EVENT_READ:
+                    member._receive(samples)
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError as e:
+                self._disconnect(member, e)
+        return samples
+
+    def stream(self):
+        while True:
+            for sample in self.poll():
+                yield sample
+
+    def close(self):
+        for member in self.members.values():
+            self._disconnect(member, None, count=False)
+        self._selector.close()
+
+    def _due(self, member, now):
+        if member.sck is None:
+            self._connect(member)
+            return
+        if not member.connected:
+            self._disconnect(member, TimeoutError("connect timed out"))
+            return
+        if member.sent_time is not None:
+            if now - member.sent_time < self.timeout:
+                member.overruns += 1
+                member.overdue = True
+                member.next_time = member.sent_time + self.timeout
+                return
+            if member._unsent is not None:
+                self._disconnect(member, TimeoutError("send timed out"))
+                return
+            member.drops += 1
+        try:
+            member._send_request(now)
+        except (BlockingIOError, InterruptedError):
+            member.drops += 1
+        except OSError as e:
+            self._disconnect(member, e)
+            return
+        if member._unsent is not None:
+            self._selector.modify(
+                member.sck, selectors.EVENT_READ | selectors.EVENT_WRITE,
+                member
+            )
+        member.next_time = max(member.next_time + 1 / member.rate, now)
+
+    def _connect(self, member):
+        member.sck = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        member.sck.setblocking(False)
+        member.sck.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        result = member.sck.connect_ex((member.tcp_ip, member.tcp_port))
+        if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK,
+                          errno.EAGAIN):
+            self._disconnect(member, OSError(result, "connect failed"))
+            return
+        member.next_time = time.monotonic() + self.timeout
+        self._selector.register(member.sck, selectors.EVENT_WRITE, member)
+
+    def _finish_connect(self, member):
+        error = member.sck.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error != 0:
+            raise OSError(error, "connect failed")
+        member.connected = True
+        member.exception = None
+        member.next_time = time.monotonic()
+        member._reader.clear()
+        self._selector.modify(member.sck, selectors.EVENT_READ, member)
+
+    def _disconnect(self, member, exception, count=True):
+        if member.sck is not None:
+            try:
+                self._selector.unregister(member.sck)
+            except (KeyError, ValueError):
+                pass
+            member.sck.close()
+            member.sck = None
+        if count and member.connected:
+            member.disconnects += 1
+        elif count:
+            member.connect_failures += 1
+        member.connected = False
+        member.sent_time = None
+        member._unsent = None
+        member.overdue = False
+        member.exception = exception
+        member.next_time = time.monotonic() + self.reconnect_interval
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,106 @@
+"""
+Splits a stream of received bytes into complete NL2 messages
+"""
+import struct
+
+from .message.request import Message
+
+
+class FrameReader(object):
+    """
+    A reusable receive buffer that yields one complete message at a time.
+
+    Every message starts with a 9 byte header ('N', type id, request id,
+    data size) and is followed by data_size bytes of data and a closing 'L'.
+    Bytes are received directly into the preallocated buffer by passing
+    writable() to e.g. socket.recv_into and reporting the number of received
+    bytes with commit(). Bytes that belong to the next message are kept.
+
+    The memoryview returned by next_frame() refers to the internal buffer and
+    is only valid until the next call of writable() or feed().
+    """
+    header_packer = struct.Struct('!cHIH')
+    header_size = header_packer.size
+    size_packer = struct.Struct('!H')
+
+    def __init__(self, capacity=4096):
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def writable(self, min_size=1):
+        """returns a view of the free buffer space with at least min_size
+        bytes, compacting or growing the buffer as needed"""
+        if len(self._buffer) - self._end < min_size:
+            pending = self._end - self._start
+            if len(self._buffer) - pending < min_size:
+                self._grow(pending + min_size)
+            else:
+                self._view[:pending] = self._view[self._start:self._end]
+            self._start = 0
+            self._end = pending
+        return self._view[self._end:]
+
+    def commit(self, size):
+        """marks size bytes written into the last writable() view as
+        received"""
+        self._end += size
+
+    def feed(self, data):
+        """copies already received data into the buffer"""
+        size = len(data)
+        self.writable(size)[:size] = data
+        self.commit(size)
+
+    def next_frame(self) -> 'memoryview':
+        """returns the next complete message or None if more bytes are
+        required"""
+        while True:
+            pending = self._end - self._start
+            if pending < self.header_size + 1:
+                return None
+            if self._buffer[self._start] != Message.magic_start[0]:
+                self._resync()
+                continue
+            (data_size,) = self.size_packer.unpack_from(
+                self._buffer, self._start + 7
+            )
+            frame_size = self.header_size + data_size + 1
+            if pending < frame_size:
+                if len(self._buffer) < frame_size:
+                    self.writable(frame_size - pending)
+                return None
+            frame_end = self._start + frame_size
+            if self._buffer[frame_end - 1] != Message.magic_end[0]:
+                self._start += 1
+                self._resync()
+                continue
+            frame = self._view[self._start:frame_end]
+            self._start = frame_end
+            if self._start == self._end:
+                self._start = self._end = 0
+            return frame
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def _resync(self):
+        """drops bytes up to the next possible message start"""
+        position = self._buffer.find(
+            Message.magic_start, self._start, self._end
+        )
+        self._start = self._end if position < 0 else position
+
+    def _grow(self, size):
+        capacity = len(self._buffer)
+        while capacity < size:
+            capacity *= 2
+        buffer = bytearray(capacity)
+        pending = self._end - self._start
+        buffer[:pending] = self._view[self._start:self._end]
+        self._buffer = buffer
+        self._view = memoryview(buffer)
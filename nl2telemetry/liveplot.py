@@ -0,0 +1,248 @@
+"""
+Live plots with constant drawing cost regardless of the session length
+(requires matplotlib)
+
+matplotlib is only imported when a plot window is opened.
+"""
+from collections import deque
+
+
+def _largest_triangle(ax, ay, xs, ys, start, end, cx, cy):
+    """the index in range(start, end) of the point spanning the largest
+    triangle with (ax, ay) and (cx, cy)"""
+    largest = -1.0
+    for index in range(start, end):
+        area = abs((ax - cx) * (ys[index] - ay)
+                   - (ax - xs[index]) * (cy - ay))
+        if area > largest:
+            largest = area
+            largest_index = index
+    return largest_index
+
+
+def lttb(xs, ys, threshold):
+    """
+    Reduces the points (xs[i], ys[i]) to threshold points with Largest
+    Triangle Three Buckets, keeping the first and the last point and the
+    point of each bucket spanning the largest triangle with its neighbours.
+    """
+    count = len(xs)
+    if threshold >= count or threshold < 3:
+        return list(xs), list(ys)
+    sampled_x = [xs[0]]
+    sampled_y = [ys[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    a = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        # the average of the next bucket is the third corner
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        next_count = next_end - end
+        average_x = sum(xs[end:next_end]) / next_count
+        average_y = sum(ys[end:next_end]) / next_count
+        a = _largest_triangle(
+            xs[a], ys[a], xs, ys, start, end, average_x, average_y
+        )
+        sampled_x.append(xs[a])
+        sampled_y.append(ys[a])
+    sampled_x.append(xs[-1])
+    sampled_y.append(ys[-1])
+    return sampled_x, sampled_y
+
+
+class TraceHistory:
+    """
+    A bounded history of points: the latest recent points at full
+    resolution and one point of every factor older points, picked like in
+    lttb. factor doubles whenever 2 * older points have been kept, by
+    keeping one point of each pair, so the older points always cover the
+    whole session evenly.
+    """
+
+    def __init__(self, recent=600, older=600):
+        self.older = older
+        self.factor = 1
+        self._recent = deque(maxlen=recent)
+        self._older_x = []
+        self._older_y = []
+        # evicted points waiting for their group to be complete
+        self._group_x = []
+        self._group_y = []
+
+    def __len__(self):
+        return (len(self._recent) + len(self._older_x)
+                + min(len(self._group_x), 1))
+
+    def add(self, x, y):
+        recent = self._recent
+        if len(recent) == recent.maxlen:
+            (old_x, old_y) = recent.popleft()
+            self._group_x.append(old_x)
+            self._group_y.append(old_y)
+            if len(self._group_x) == self.factor:
+                # the point following the group is the third corner
+                self._keep_group(*(recent[0] if recent else (x, y)))
+        recent.append((x, y))
+
+    def _keep_group(self, next_x, next_y):
+        xs = self._group_x
+        ys = self._group_y
+        if self._older_x:
+            index = _largest_triangle(
+                self._older_x[-1], self._older_y[-1], xs, ys, 0, len(xs),
+                next_x, next_y
+            )
+        else:
+            index = 0
+        self._older_x.append(xs[index])
+        self._older_y.append(ys[index])
+        self._group_x = []
+        self._group_y = []
+        if len(self._older_x) >= 2 * self.older:
+            self._halve(next_x, next_y)
+
+    def _halve(self, next_x, next_y):
+        xs = self._older_x
+        ys = self._older_y
+        count = len(xs)
+        # the first point of the session is kept
+        kept_x = [xs[0]]
+        kept_y = [ys[0]]
+        for start in range(2, count, 2):
+            if start + 2 < count:
+                # the average of the next pair is the third corner
+                cx = (xs[start + 2] + xs[start + 3]) / 2
+                cy = (ys[start + 2] + ys[start + 3]) / 2
+            else:
+                (cx, cy) = (next_x, next_y)
+            index = _largest_triangle(
+                kept_x[-1], kept_y[-1], xs, ys, start, start + 2, cx, cy
+            )
+            kept_x.append(xs[index])
+            kept_y.append(ys[index])
+        self._older_x = kept_x
+        self._older_y = kept_y
+        self.factor *= 2
+
+    def points(self):
+        """lists of the x and y values from oldest to latest"""
+        xs = self._older_x + self._group_x[:1]
+        ys = self._older_y + self._group_y[:1]
+        for x, y in self._recent:
+            xs.append(x)
+            ys.append(y)
+        return xs, ys
+
+    def clear(self):
+        self.factor = 1
+        self._recent.clear()
+        self._older_x = []
+        self._older_y = []
+        self._group_x = []
+        self._group_y = []
+
+
+class BlitPlot:
+    """
+    Redraws only the given animated artists of an axes on top of a saved
+    background. The background is saved again whenever the figure is drawn
+    completely, e.g. after resizing the window.
+    """
+
+    def __init__(self, ax, artists):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.artists = list(artists)
+        self._background = None
+        for artist in self.artists:
+            artist.set_animated(True)
+        self._draw_handler = self.canvas.mpl_connect(
+            'draw_event', self._on_draw
+        )
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    def update(self):
+        if self._background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_artists()
+        self.canvas.blit(self.ax.bbox)
+        self.canvas.flush_events()
+
+    def close(self):
+        self.canvas.mpl_disconnect(self._draw_handler)
+
+
+class GForcePlot:
+    """
+    Plots the lateral (x) against the vertical (y) g-force of telemetry
+    with a trace of the history and the current g-force vector.
+    """
+
+    def __init__(self, history=None, xlim=(-3, 3), ylim=(6, -2)):
+        self.history = TraceHistory() if history is None else history
+        self.xlim = xlim
+        self.ylim = ylim
+        self.figure = None
+        self._blit = None
+        self._trace = None
+        self._vector = None
+        self._latest = (0.0, 1.0)
+
+    def open(self):
+        import matplotlib.pyplot as plt
+
+        self.figure, ax = plt.subplots(1, 1)
+        ax.set_aspect('equal')
+        ax.set_xlim(*self.xlim)
+        ax.set_ylim(*self.ylim)
+        self._trace = ax.plot([], [], '-')[0]
+        self._vector = ax.plot([0, 0], [0, 1], '-')[0]
+        self._blit = BlitPlot(ax, (self._trace, self._vector))
+        plt.show(block=False)
+        self.figure.canvas.draw()
+
+    @property
+    def is_open(self):
+        if self.figure is None:
+            return False
+        import matplotlib.pyplot as plt
+
+        return plt.fignum_exists(self.figure.number)
+
+    def add(self, data):
+        self.history.add(data.gforce_x, data.gforce_y)
+        self._latest = (data.gforce_x, data.gforce_y)
+
+    def draw(self):
+        self._trace.set_data(*self.history.points())
+        self._vector.set_data([0, self._latest[0]], [0, self._latest[1]])
+        self._blit.update()
+
+    def wait(self, seconds):
+        """handles window events for seconds"""
+        self.figure.canvas.start_event_loop(seconds)
+
+    def close(self):
+        if self.figure is not None:
+            import matplotlib.pyplot as plt
+
+            self._blit.close()
+            plt.close(self.figure)
+            self.figure = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
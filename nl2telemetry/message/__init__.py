@@ -1,5 +1,8 @@
 """
 Implements aliases and default instances of the messages
+
+The default instances are shared, use nl2telemetry.message.encode to build
+requests without shared state, e.g. from several threads.
 """
 from . import request
 
@@ -0,0 +1,147 @@
+"""
+Stateless encoders for NL2 requests
+
+Every encoder packs header, data and trailer of a request with a single
+precompiled struct, so no message instance is shared between callers:
+
+    nl2.send(encode_dispatch(coaster_index, station_index, request_id))
+
+The type ids and data formats are taken from the message classes of
+nl2telemetry.message.request.
+"""
+import struct
+
+from . import request
+
+_start = request.Message.magic_start
+_end = request.Message.magic_end
+
+
+class Encoder(object):
+    """
+    Encodes requests of a single type. encode() returns new bytes,
+    pack_into() writes into a caller provided buffer.
+    """
+
+    def __init__(self, type_id, data_format=''):
+        self.type_id = type_id
+        self.data_size = struct.calcsize('!' + data_format)
+        self.packer = struct.Struct('!cHIH' + data_format + 'c')
+        self.size = self.packer.size
+
+    @classmethod
+    def from_request(cls, request_type):
+        """the encoder of a request class of nl2telemetry.message.request"""
+        msg = request_type()
+        return cls(msg.type_id, getattr(msg, 'data_format', ''))
+
+    def encode(self, *data, request_id=0) -> bytes:
+        return self.packer.pack(
+            _start, self.type_id, request_id, self.data_size, *data, _end
+        )
+
+    def pack_into(self, buffer, offset, *data, request_id=0):
+        self.packer.pack_into(
+            buffer, offset,
+            _start, self.type_id, request_id, self.data_size, *data, _end
+        )
+
+
+idle = Encoder.from_request(request.IdleMessage)
+get_version = Encoder.from_request(request.GetVersionMessage)
+get_telemetry = Encoder.from_request(request.GetTelemetryMessage)
+get_coaster_count = Encoder.from_request(request.getCoasterCountMessage)
+get_coaster_name = Encoder.from_request(request.GetCoasterNameMessage)
+get_current_coaster_and_nearest_station = Encoder.from_request(
+    request.GetCurrentCoasterAndNearestStationMessage
+)
+set_emergency_stop = Encoder.from_request(request.SetEmergencyStopMessage)
+get_station_state = Encoder.from_request(request.GetStationStateMessage)
+set_manual_mode = Encoder.from_request(request.SetManualModeMessage)
+dispatch = Encoder.from_request(request.DispatchMessage)
+set_gates = Encoder.from_request(request.SetGatesMessage)
+set_harness = Encoder.from_request(request.SetHarnessMessage)
+set_platform = Encoder.from_request(request.SetPlatformMessage)
+set_flyer_car = Encoder.from_request(request.SetFlyerCarMessage)
+quit_server = Encoder.from_request(request.QuitServerMessage)
+set_pause = Encoder.from_request(request.SetPauseMessage)
+select_seat = Encoder.from_request(request.SelectSeatMessage)
+recenter_vr = Encoder.from_request(request.RecenterVrMessage)
+set_custom_view = Encoder.from_request(request.SetCustomViewMessage)
+
+
+def _encode_function(name, encoder, parameters, *fixed):
+    """
+    Creates encode_<name>, which packs the values of parameters followed by
+    the fixed values. The function is compiled for its exact parameters,
+    like the methods of collections.namedtuple, since packing variable
+    arguments takes about twice as long.
+    """
+    function_name = 'encode_' + name
+    values = list(parameters) + [repr(value) for value in fixed]
+    source = (
+        'def {}({}) -> bytes:\n'
+        '    return _pack(_start, {}, request_id, {}, {})\n'
+    ).format(
+        function_name, ', '.join(list(parameters) + ['request_id=0']),
+        encoder.type_id, encoder.data_size, ', '.join(values + ['_end'])
+    )
+    namespace = {'_pack': encoder.packer.pack, '_start': _start, '_end': _end}
+    exec(source, namespace)
+    function = namespace[function_name]
+    function.__module__ = __name__
+    return function
+
+
+_station = ('coaster_index', 'station_index')
+_view = ('position_x', 'position_y', 'position_z', 'azimuth_angle',
+         'elevation_angle')
+
+encode_idle = _encode_function('idle', idle, ())
+encode_get_version = _encode_function('get_version', get_version, ())
+encode_get_telemetry = _encode_function('get_telemetry', get_telemetry, ())
+encode_get_coaster_count = _encode_function(
+    'get_coaster_count', get_coaster_count, ()
+)
+encode_get_coaster_name = _encode_function(
+    'get_coaster_name', get_coaster_name, ('coaster_index',)
+)
+encode_get_current_coaster_and_nearest_station = _encode_function(
+    'get_current_coaster_and_nearest_station',
+    get_current_coaster_and_nearest_station, ()
+)
+encode_set_emergency_stop = _encode_function(
+    'set_emergency_stop', set_emergency_stop, ('coaster_index', 'status')
+)
+encode_get_station_state = _encode_function(
+    'get_station_state', get_station_state, _station
+)
+encode_set_manual_mode = _encode_function(
+    'set_manual_mode', set_manual_mode, _station + ('status',)
+)
+encode_dispatch = _encode_function('dispatch', dispatch, _station)
+encode_set_gates = _encode_function(
+    'set_gates', set_gates, _station + ('status',)
+)
+encode_set_harness = _encode_function(
+    'set_harness', set_harness, _station + ('status',)
+)
+encode_set_platform = _encode_function(
+    'set_platform', set_platform, _station + ('status',)
+)
+encode_set_flyer_car = _encode_function(
+    'set_flyer_car', set_flyer_car, _station + ('status',)
+)
+encode_quit_server = _encode_function('quit_server', quit_server, ())
+encode_set_pause = _encode_function('set_pause', set_pause, ('enabled',))
+encode_select_seat = _encode_function(
+    'select_seat', select_seat,
+    ('coaster_index', 'train_index', 'car_index', 'seat_index')
+)
+encode_recenter_vr = _encode_function('recenter_vr', recenter_vr, ())
+encode_set_fly_view = _encode_function(
+    'set_fly_view', set_custom_view, _view, 0
+)
+encode_set_walk_view = _encode_function(
+    'set_walk_view', set_custom_view, _view, 1
+)
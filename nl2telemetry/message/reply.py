@@ -1,160 +1,217 @@
 """
 Classes that represent the replyed data by the Server
+
+Every decoded reply is a new immutable record (a named tuple), so replies may
+be kept, queued or passed between threads without copying them. Flags are
+read from the raw state word of a record when they are accessed.
 """
 import struct
+from collections import namedtuple
 
 data_types = {}
 
 
+def _state_flags(*flag_names):
+    """
+    Adds a read only boolean attribute for each bit of the state field of a
+    record. The position of a name is the position of its bit.
+    """
+
+    def add_flags(cls):
+        for position, name in enumerate(flag_names):
+            setattr(cls, name, property(
+                lambda self, mask=1 << position: self.state & mask > 0
+            ))
+        fields_asdict = cls._asdict
+
+        def _asdict(self):
+            values = fields_asdict(self)
+            for name in flag_names:
+                values[name] = getattr(self, name)
+            return values
+
+        cls.flag_names = flag_names
+        cls._asdict = _asdict
+        return cls
+
+    return add_flags
+
+
 class ReplyData(object):
+    __slots__ = ()
     data_name = ''
+    data_format = ''
+
+    @classmethod
+    def _from_buffer(cls, buffer, offset, size):
+        """decodes size bytes of buffer starting at offset into a new
+        record, buffer is not retained"""
+        return cls()
 
-    def _set_data(self, data):
-        self._blob = data
-        self._set_attributes()
+    def _asdict(self):
+        return {}
 
-    def _set_attributes(self):
-        pass
+    flag_names = ()
 
 
 empty_instance = ReplyData()
 
 
-class OkData(ReplyData):
+class OkData(namedtuple('OkData', ()), ReplyData):
+    __slots__ = ()
     data_name = 'ok'
     data_format = ''
 
 
-data_types[1] = OkData()
+data_types[1] = OkData
 
 
-class ErrorData(ReplyData):
+class ErrorData(namedtuple('ErrorData', ('text',)), ReplyData):
+    __slots__ = ()
     data_name = 'error'
     data_format = ''
 
-    def _set_attributes(self):
-        self.text = self._blob.decode("utf-8")
+    @classmethod
+    def _from_buffer(cls, buffer, offset, size):
+        return tuple.__new__(
+            cls, (str(buffer[offset:offset + size], "utf-8"),)
+        )
 
 
-data_types[2] = ErrorData()
+data_types[2] = ErrorData
 
 
-class VersionData(ReplyData):
+class VersionData(namedtuple('VersionData', (
+    'main',
+    'minor',
+    'revision',
+    'build',
+)), ReplyData):
+    __slots__ = ()
     data_name = 'version'
     data_format = '!bbbb'
     packer = struct.Struct(data_format)
 
-    def _set_attributes(self):
-        (
-            self.main,
-            self.minor,
-            self.revision,
-            self.build,
-        ) = self.packer.unpack(self._blob)
+    @classmethod
+    def _from_buffer(cls, buffer, offset, size):
+        return tuple.__new__(cls, cls.packer.unpack_from(buffer, offset))
+
+
+data_types[4] = VersionData
+
+
+@_state_flags(
+    'in_play_mode',
+    'braking',
+    'paused_state',
+)
+class TelemetryData(namedtuple('TelemetryData', (
+    'state',
+    'rendered_frame',
+    'view_mode',
+    'current_coaster',
+    'coaster_style_id',
+    'current_train',
+    'current_car',
+    'current_seat',
+    'speed',
+    'position_x',
+    'position_y',
+    'position_z',
+    'rotation_quaternion_x',
+    'rotation_quaternion_y',
+    'rotation_quaternion_z',
+    'rotation_quaternion_w',
+    'gforce_x',
+    'gforce_y',
+    'gforce_z',
+)), ReplyData):
+    __slots__ = ()
+    data_name = 'telemetry'
+    data_format = '!iiiiiiiifffffffffff'
+    packer = struct.Struct(data_format)
 
+    @classmethod
+    def _from_buffer(cls, buffer, offset, size):
+        return tuple.__new__(cls, cls.packer.unpack_from(buffer, offset))
 
-data_types[4] = VersionData()
 
+data_types[6] = TelemetryData
 
-class TelemetryData(ReplyData):
-    data_name = 'telemetry'
-    data_format = '!iiiiiiiifffffffffff'
-    packer = struct.Struct(data_format)
 
-    def _set_attributes(self):
-        (
-            state,
-            self.rendered_frame,
-            self.view_mode,
-            self.current_coaster,
-            self.coaster_style_id,
-            self.current_train,
-            self.current_car,
-            self.current_seat,
-            self.speed,
-            self.position_x,
-            self.position_y,
-            self.position_z,
-            self.rotation_quaternion_x,
-            self.rotation_quaternion_y,
-            self.rotation_quaternion_z,
-            self.rotation_quaternion_w,
-            self.gforce_x,
-            self.gforce_y,
-            self.gforce_z,
-        ) = self.packer.unpack(self._blob)
-        self.in_play_mode = is_bit_set(state, 0)
-        self.braking = is_bit_set(state, 1)
-        self.paused_state = is_bit_set(state, 2)
-
-
-data_types[6] = TelemetryData()
-
-
-class IntValueData(ReplyData):
+class IntValueData(namedtuple('IntValueData', ('value',)), ReplyData):
+    __slots__ = ()
     data_name = 'int value'
     data_format = '!i'
     packer = struct.Struct(data_format)
 
-    def _set_attributes(self):
-        (
-            self.value,
-        ) = self.packer.unpack(self._blob)
+    @classmethod
+    def _from_buffer(cls, buffer, offset, size):
+        return tuple.__new__(cls, cls.packer.unpack_from(buffer, offset))
 
 
-data_types[8] = IntValueData()
+data_types[8] = IntValueData
 
 
-class StringData(ReplyData):
+class StringData(namedtuple('StringData', ('value',)), ReplyData):
+    __slots__ = ()
     data_name = 'string'
     data_format = ''
 
-    def _set_attributes(self):
-        self.value = self._blob.decode("utf-8")
+    @classmethod
+    def _from_buffer(cls, buffer, offset, size):
+        return tuple.__new__(
+            cls, (str(buffer[offset:offset + size], "utf-8"),)
+        )
 
 
-data_types[10] = StringData()
+data_types[10] = StringData
 
 
-class IntValuePairData(ReplyData):
+class IntValuePairData(namedtuple('IntValuePairData', (
+    'value0',
+    'value1',
+)), ReplyData):
+    __slots__ = ()
     data_name = 'int value pair'
     data_format = '!ii'
     packer = struct.Struct(data_format)
 
-    def _set_attributes(self):
-        (
-            self.value0,
-            self.value1,
-        ) = self.packer.unpack(self._blob)
-
-
-data_types[12] = IntValuePairData()
-
-
-class StationStateData(ReplyData):
+    @classmethod
+    def _from_buffer(cls, buffer, offset, size):
+        return tuple.__new__(cls, cls.packer.unpack_from(buffer, offset))
+
+
+data_types[12] = IntValuePairData
+
+
+@_state_flags(
+    'e_stop',
+    'manual_dispatch',
+    'can_dispatch',
+    'can_close_gates',
+    'can_open_gates',
+    'can_close_harness',
+    'can_open_harness',
+    'can_raise_platform',
+    'can_lower_platform',
+    'can_lock_flyer_car',
+    'can_unlock_flyer_car',
+    'train_in_station',
+    'train_in_station_is_current',
+)
+class StationStateData(namedtuple('StationStateData', ('state',)), ReplyData):
+    __slots__ = ()
     data_name = 'station state'
     data_format = '!I'
     packer = struct.Struct(data_format)
 
-    def _set_attributes(self):
-        (integer,) = self.packer.unpack(self._blob)
-
-        self.e_stop = is_bit_set(integer, 0)
-        self.manual_dispatch = is_bit_set(integer, 1)
-        self.can_dispatch = is_bit_set(integer, 2)
-        self.can_close_gates = is_bit_set(integer, 3)
-        self.can_open_gates = is_bit_set(integer, 4)
-        self.can_close_harness = is_bit_set(integer, 5)
-        self.can_open_harness = is_bit_set(integer, 6)
-        self.can_raise_platform = is_bit_set(integer, 7)
-        self.can_lower_platform = is_bit_set(integer, 8)
-        self.can_lock_flyer_car = is_bit_set(integer, 9)
-        self.can_unlock_flyer_car = is_bit_set(integer, 10)
-        self.train_in_station = is_bit_set(integer, 11)
-        self.train_in_station_is_current = is_bit_set(integer, 12)
-
-
-data_types[15] = StationStateData()
+    @classmethod
+    def _from_buffer(cls, buffer, offset, size):
+        return tuple.__new__(cls, cls.packer.unpack_from(buffer, offset))
+
+
+data_types[15] = StationStateData
 
 
 def is_bit_set(integer, position):
@@ -12,30 +12,39 @@ class Message(object):
     magic_start = b'N'
     magic_end = b'L'
     head_packer = struct.Struct('!HIH')
+    size_packer = struct.Struct('!H')
     type_name = ''
-
-    """msg is an argument because its buffer will be set to the bytearray
-    used here when it is valid"""
+    _magic_start_byte = magic_start[0]
+    _magic_end_byte = magic_end[0]
 
     @classmethod
-    def is_valid(cls, bytes, msg):
-        length = len(bytes)
-        if (length >= 10):
-            buffer = bytearray(bytes)
-            (magic_start,) = cls.magic_packer.unpack(buffer[:1])
-            (magic_end,) = cls.magic_packer.unpack_from(buffer, length - 1)
-            if (magic_start == cls.magic_start and magic_end == cls.magic_end):
-                msg.buffer = buffer
-                return True
+    def is_valid(cls, buffer, offset=0) -> bool:
+        """checks the framing of the message starting at offset without
+        copying the buffer"""
+        length = len(buffer)
+        if length - offset >= 10 and buffer[offset] == cls._magic_start_byte:
+            (data_size,) = cls.size_packer.unpack_from(buffer, offset + 7)
+            end = offset + 9 + data_size
+            return end < length and buffer[end] == cls._magic_end_byte
         return False
 
     @classmethod
-    def build(cls, received_bytes) -> Union['Message', None]:
-        msg = Message()
-        if cls.is_valid(received_bytes, msg):
+    def build(cls, received_bytes, offset=0) -> Union['Message', None]:
+        """
+        Decodes the message starting at offset in received_bytes, which may
+        be any bytes-like object such as the memoryview returned by receive().
+
+        The data is unpacked directly from received_bytes, the buffer
+        attribute of the returned message refers to received_bytes and is not
+        a copy.
+        """
+        if cls.is_valid(received_bytes, offset):
+            msg = Message()
+            msg.buffer = received_bytes
+            msg.offset = offset
             (
                 msg.type_id, msg.request_id, msg.data_size
-            ) = cls.head_packer.unpack(msg.buffer[1:9])
+            ) = cls.head_packer.unpack_from(received_bytes, offset + 1)
             msg._set_data_from_type()
             msg._set_name_from_data()
             return msg
@@ -43,18 +52,19 @@ class Message(object):
             return None
 
     @classmethod
-    def get_data(cls, received_bytes) -> Union['reply.ReplyData', None]:
-        message = cls.build(received_bytes)
+    def get_data(cls, received_bytes,
+                 offset=0) -> Union['reply.ReplyData', None]:
+        message = cls.build(received_bytes, offset)
         if message is not None:
             return message.data_object
         else:
             return None
 
     def _set_data_from_type(self):
-        self.data_object = reply.data_types.get(
-            self.type_id, reply.empty_instance
+        data_type = reply.data_types.get(self.type_id, reply.ReplyData)
+        self.data_object = data_type._from_buffer(
+            self.buffer, self.offset + 9, self.data_size
         )
-        self.data_object._set_data(self.buffer[9:9 + self.data_size])
 
     def _set_name_from_data(self):
         self.type_name = self.data_object.data_name
@@ -0,0 +1,85 @@
+"""
+Caches coaster metadata that only changes when a park is loaded
+"""
+import time
+
+from .message import encode
+from .message.request import Message
+from .message.reply import IntValueData, IntValuePairData, StringData
+from .transmitter import TcpTransmitter
+
+
+class CoasterMetadata:
+    """
+    Caches the coaster count, the coaster names and the current coaster and
+    nearest station.
+
+    Entries expire after ttl seconds, the current coaster and nearest station
+    after station_ttl seconds since they change whenever the camera moves.
+    Pass received TelemetryData to observe() to clear the cache as soon as
+    the current coaster or coaster style changes, e.g. after loading another
+    park. Error replies are returned as None and not cached.
+    """
+
+    def __init__(self, transmitter: TcpTransmitter, ttl=60.0,
+                 station_ttl=0.5):
+        self.transmitter = transmitter
+        self.ttl = ttl
+        self.station_ttl = station_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._coaster = None
+
+    def coaster_count(self):
+        return self._get(
+            'count', self.ttl, encode.encode_get_coaster_count, IntValueData,
+            lambda data: data.value
+        )
+
+    def coaster_name(self, coaster_index):
+        return self._get(
+            ('name', coaster_index), self.ttl,
+            lambda: encode.encode_get_coaster_name(coaster_index), StringData,
+            lambda data: data.value
+        )
+
+    def coaster_names(self) -> list:
+        count = self.coaster_count()
+        if count is None:
+            return []
+        return [self.coaster_name(index) for index in range(count)]
+
+    def current_coaster_and_station(self):
+        """(coaster index, station index) or None"""
+        return self._get(
+            'station', self.station_ttl,
+            encode.encode_get_current_coaster_and_nearest_station,
+            IntValuePairData, lambda data: (data.value0, data.value1)
+        )
+
+    def observe(self, telemetry):
+        """clears the cache if the current coaster of telemetry changed"""
+        coaster = (telemetry.current_coaster, telemetry.coaster_style_id)
+        if coaster != self._coaster:
+            if self._coaster is not None:
+                self.invalidate()
+            self._coaster = coaster
+
+    def invalidate(self):
+        self._entries.clear()
+
+    def _get(self, key, ttl, encode_request, data_type, value_of):
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[1] < ttl:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        (reply,) = self.transmitter.request_batch((encode_request(),))
+        data = Message.get_data(reply)
+        if not isinstance(data, data_type):
+            return None
+        value = value_of(data)
+        self._entries[key] = (value, now)
+        return value
@@ -0,0 +1,72 @@
+"""
+Keeps several requests in flight on a single connection
+"""
+from concurrent.futures import Future
+
+from .message.request import Message
+from .transmitter import TcpTransmitter
+
+
+class PipelinedTransmitter:
+    """
+    Sends requests without waiting for the previous reply and matches the
+    replies by their request id.
+
+    submit() returns a Future that is resolved with the raw reply bytes, which
+    can be passed to Answer.build or Answer.get_data just like the return
+    value of TcpTransmitter.receive. Replies are read whenever a slot is
+    required, by wait() and by flush(). Requests may be message instances or
+    encoded requests (see nl2telemetry.message.encode), the request id is set
+    in a copy of them.
+    """
+
+    def __init__(self, transmitter: TcpTransmitter, max_in_flight=8):
+        self.transmitter = transmitter
+        self.max_in_flight = max_in_flight
+        self.unmatched_replies = 0
+        self._pending = {}
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    def submit(self, msg, callback=None) -> Future:
+        """sends msg with a fresh request id, callback is called with the
+        future once the reply has arrived"""
+        while len(self._pending) >= self.max_in_flight:
+            self._receive_one()
+
+        (request_id, buffer) = self.transmitter._stamp(msg)
+        self.transmitter.send(buffer)
+
+        # registered once sent, a failed send must not occupy a slot
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        self._pending[request_id] = future
+        return future
+
+    def wait(self, future: Future):
+        """receives replies until future is resolved and returns its reply"""
+        while not future.done():
+            self._receive_one()
+        return future.result()
+
+    def flush(self):
+        """receives replies until no request is in flight anymore"""
+        while self._pending:
+            self._receive_one()
+
+    def _receive_one(self):
+        frame = self.transmitter.receive()
+        (_, request_id, _) = Message.head_packer.unpack_from(frame, 1)
+        future = self._pending.pop(request_id, None)
+        if future is None:
+            self.unmatched_replies += 1
+        else:
+            future.set_result(bytes(frame))
+
+    def close(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
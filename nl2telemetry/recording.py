@@ -0,0 +1,234 @@
+"""
+An append-only binary file format for recorded replies
+
+A recording starts with a 16 byte header (magic, format version, reply type
+id, payload size) followed by fixed size records. Each record consists of a
+big-endian double timestamp (time.monotonic) and the raw payload of one reply
+as received from NL2. A torn last record, e.g. after a crash, is ignored by
+the reader and truncated when appending to the file again.
+"""
+import mmap
+import os
+import struct
+
+from .message import reply
+from .message.reply import TelemetryData
+from .sampler import Sample
+
+file_magic = b'NL2REC'
+file_version = 1
+header_packer = struct.Struct('!6sHHHxxxx')
+time_packer = struct.Struct('!d')
+
+
+class RecordingError(Exception):
+    pass
+
+
+def _type_id_of(data_type):
+    for type_id, known_type in reply.data_types.items():
+        if known_type is data_type:
+            return type_id
+    raise RecordingError("{} is no reply type".format(data_type))
+
+
+def _read_header(buffer):
+    if len(buffer) < header_packer.size:
+        raise RecordingError("file is too short for a recording")
+    (magic, version, type_id, payload_size) = header_packer.unpack_from(
+        buffer, 0
+    )
+    if magic != file_magic:
+        raise RecordingError("file is no recording")
+    if version != file_version:
+        raise RecordingError(
+            "unsupported recording version {}".format(version)
+        )
+    data_type = reply.data_types.get(type_id)
+    if data_type is None or \
+            struct.calcsize(data_type.data_format) != payload_size:
+        raise RecordingError("unsupported reply type {}".format(type_id))
+    return data_type, payload_size
+
+
+class Recorder:
+    """
+    Appends timestamped replies of a fixed size type to a recording file.
+
+    Records are written through a buffered file, flush() makes them visible
+    to readers and crash safe.
+    """
+
+    def __init__(self, path, data_type=TelemetryData):
+        self.path = path
+        self.data_type = data_type
+        self.payload_size = struct.calcsize(data_type.data_format)
+        self.record_size = time_packer.size + self.payload_size
+        self._file = None
+
+    def open(self):
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        self._file = open(self.path, 'r+b' if exists else 'w+b')
+        if exists:
+            header = self._file.read(header_packer.size)
+            data_type, _ = _read_header(header)
+            if data_type is not self.data_type:
+                self._file.close()
+                raise RecordingError("recording contains {} replies".format(
+                    data_type.data_name
+                ))
+            size = os.path.getsize(self.path) - header_packer.size
+            complete = header_packer.size + \
+                size // self.record_size * self.record_size
+            self._file.truncate(complete)
+            self._file.seek(complete)
+        else:
+            self._file.write(header_packer.pack(
+                file_magic, file_version, _type_id_of(self.data_type),
+                self.payload_size
+            ))
+
+    def append(self, timestamp, payload):
+        """appends the raw payload (data without message header) of a
+        reply"""
+        if len(payload) != self.payload_size:
+            raise RecordingError("payload size must be {}".format(
+                self.payload_size
+            ))
+        self._file.write(time_packer.pack(timestamp))
+        self._file.write(payload)
+
+    def append_frame(self, timestamp, frame):
+        """appends the payload of a complete reply, e.g. as returned by
+        TcpTransmitter.receive"""
+        self.append(timestamp, memoryview(frame)[9:-1])
+
+    def append_data(self, timestamp, data):
+        """appends a decoded reply record"""
+        self._file.write(time_packer.pack(timestamp))
+        self._file.write(self.data_type.packer.pack(*data))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class Records:
+    """
+    A sequence of records of a memory mapped recording.
+
+    Indexing returns a Sample with the decoded reply, slicing returns another
+    Records without copying anything.
+    """
+
+    def __init__(self, view, data_type, payload_size, indices):
+        self._view = view
+        self.data_type = data_type
+        self.payload_size = payload_size
+        self.record_size = time_packer.size + payload_size
+        self._indices = indices
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return Records(self._view, self.data_type, self.payload_size,
+                           self._indices[item])
+        offset = self._indices[item] * self.record_size
+        (timestamp,) = time_packer.unpack_from(self._view, offset)
+        data = self.data_type._from_buffer(
+            self._view, offset + time_packer.size, self.payload_size
+        )
+        return Sample(timestamp, data)
+
+    def __iter__(self):
+        view = self._view
+        record_size = self.record_size
+        payload_offset = time_packer.size
+        from_buffer = self.data_type._from_buffer
+        payload_size = self.payload_size
+        unpack_time = time_packer.unpack_from
+        for index in self._indices:
+            offset = index * record_size
+            yield Sample(
+                unpack_time(view, offset)[0],
+                from_buffer(view, offset + payload_offset, payload_size)
+            )
+
+    def timestamp(self, index):
+        offset = self._indices[index] * self.record_size
+        return time_packer.unpack_from(self._view, offset)[0]
+
+    def payload(self, index) -> memoryview:
+        """the raw payload of a record without copying it"""
+        offset = self._indices[index] * self.record_size + time_packer.size
+        return self._view[offset:offset + self.payload_size]
+
+    def to_numpy(self):
+        """a structured array with a timestamp and the big-endian payload
+        fields viewing the mapped file (requires numpy)"""
+        import numpy
+        from .batch import payload_dtype
+
+        payload = payload_dtype(self.data_type)
+        dtype = numpy.dtype(
+            [('timestamp', '>f8')]
+            + [(name, payload[name]) for name in payload.names]
+        )
+        count = len(self._view) // self.record_size
+        records = numpy.frombuffer(self._view, dtype=dtype, count=count)
+        indices = self._indices
+        stop = indices.stop if indices.stop >= 0 else None
+        return records[indices.start:stop:indices.step]
+
+
+class RecordingReader(Records):
+    """
+    Memory maps a recording for reading. Records appended after opening the
+    reader are not visible.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.getsize(path) < header_packer.size:
+            raise RecordingError("file is too short for a recording")
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            data_type, payload_size = _read_header(self._mmap)
+        except RecordingError:
+            self._mmap.close()
+            raise
+        record_size = time_packer.size + payload_size
+        count = (len(self._mmap) - header_packer.size) // record_size
+        view = memoryview(self._mmap)[
+            header_packer.size:header_packer.size + count * record_size
+        ]
+        Records.__init__(self, view, data_type, payload_size, range(count))
+
+    def close(self):
+        """unmaps the file, unless payloads or arrays still refer to it, the
+        mapping is released together with them then"""
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,156 @@
+"""
+Rolling statistics of live telemetry over time windows
+"""
+import math
+from collections import deque
+
+
+class RollingWindow:
+    """
+    The minimum, maximum, mean and approximate quantiles of the values added
+    during the last seconds.
+
+    Minimum and maximum are kept in monotonic deques and the mean as a
+    running sum, so add() takes amortized constant time. Quantiles are read
+    from counts of buckets resolution wide and are accurate to half a bucket.
+    """
+
+    def __init__(self, seconds, resolution=0.01):
+        self.seconds = seconds
+        self.resolution = resolution
+        self._values = deque()
+        self._minimum = deque()
+        self._maximum = deque()
+        self._buckets = {}
+        self._sum = 0.0
+
+    def add(self, time, value):
+        self._values.append((time, value))
+        self._sum += value
+        bucket = math.floor(value / self.resolution)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+
+        minimum = self._minimum
+        while minimum and minimum[-1][1] >= value:
+            minimum.pop()
+        minimum.append((time, value))
+        maximum = self._maximum
+        while maximum and maximum[-1][1] <= value:
+            maximum.pop()
+        maximum.append((time, value))
+
+        self.expire(time)
+
+    def expire(self, now):
+        """removes the values added before now - seconds"""
+        oldest = now - self.seconds
+        values = self._values
+        while values and values[0][0] <= oldest:
+            (_, value) = values.popleft()
+            self._sum -= value
+            bucket = math.floor(value / self.resolution)
+            count = self._buckets[bucket] - 1
+            if count:
+                self._buckets[bucket] = count
+            else:
+                del self._buckets[bucket]
+        if not values:
+            self._sum = 0.0
+        while self._minimum and self._minimum[0][0] <= oldest:
+            self._minimum.popleft()
+        while self._maximum and self._maximum[0][0] <= oldest:
+            self._maximum.popleft()
+
+    @property
+    def count(self):
+        return len(self._values)
+
+    @property
+    def min(self):
+        return self._minimum[0][1] if self._minimum else None
+
+    @property
+    def max(self):
+        return self._maximum[0][1] if self._maximum else None
+
+    @property
+    def mean(self):
+        return self._sum / len(self._values) if self._values else None
+
+    def quantile(self, q):
+        """the approximate value below which a fraction q of the values
+        lies, clamped to min and max"""
+        if not self._values:
+            return None
+        rank = q * len(self._values)
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                value = (bucket + 0.5) * self.resolution
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+        }
+
+
+class RollingStatistics:
+    """
+    Keeps a RollingWindow per channel (a TelemetryData field) and window
+    length in seconds, updated by every sample.
+
+    Feed it sampler.Sample records, e.g. from TelemetrySampler.samples or
+    FrameDeduplicator.filter_samples, with add() or by iterating over
+    filter().
+    """
+
+    def __init__(self, channels=('gforce_x', 'gforce_y', 'gforce_z', 'speed'),
+                 windows=(1.0, 10.0, 60.0), resolution=0.01):
+        self.channels = tuple(channels)
+        self.windows = tuple(windows)
+        self._windows = [
+            (channel, [RollingWindow(seconds, resolution)
+                       for seconds in self.windows])
+            for channel in self.channels
+        ]
+
+    def add(self, sample):
+        time = sample.time
+        data = sample.data
+        for channel, windows in self._windows:
+            value = getattr(data, channel)
+            for window in windows:
+                window.add(time, value)
+
+    def filter(self, stream):
+        """adds and yields every sample of stream"""
+        for sample in stream:
+            self.add(sample)
+            yield sample
+
+    def window(self, channel, seconds) -> RollingWindow:
+        for name, windows in self._windows:
+            if name == channel:
+                return windows[self.windows.index(seconds)]
+        raise KeyError(channel)
+
+    def snapshot(self, now=None):
+        """the statistics per channel and window length, expiring old values
+        first if now (a sample time) is given"""
+        result = {}
+        for channel, windows in self._windows:
+            result[channel] = {}
+            for window in windows:
+                if now is not None:
+                    window.expire(now)
+                result[channel][window.seconds] = window.snapshot()
+        return result
@@ -0,0 +1,151 @@
+"""
+Polls telemetry at a fixed rate on a background thread
+"""
+import threading
+import time
+from collections import namedtuple
+
+from .message import Answer
+from .message.reply import TelemetryData
+from .message.request import GetTelemetryMessage
+from .transmitter import TcpTransmitter
+
+Sample = namedtuple('Sample', ('time', 'data'))
+Sample.__doc__ = """TelemetryData received at time (time.monotonic)"""
+
+
+class RingBuffer:
+    """
+    A bounded history written by a single thread and read by any number of
+    threads without locking.
+
+    The writer stores an item before publishing it by increasing the count,
+    readers discard items that may have been overwritten while they were
+    copied. One spare slot holds the item that is currently being written.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._slots = capacity + 1
+        self._items = [None] * self._slots
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def count(self):
+        """the number of items appended so far"""
+        return self._count
+
+    def append(self, item):
+        count = self._count
+        self._items[count % self._slots] = item
+        self._count = count + 1
+
+    def latest(self):
+        """the most recently appended item or None"""
+        count = self._count
+        if count == 0:
+            return None
+        return self._items[(count - 1) % self._slots]
+
+    def read_since(self, position=0):
+        """
+        Returns the items appended since position (a previously returned
+        count) from oldest to newest together with the new position. Items
+        that were already overwritten are skipped.
+        """
+        end = self._count
+        start = max(position, end - self.capacity)
+        items = [self._items[index % self._slots]
+                 for index in range(start, end)]
+        first_valid = self._count + 1 - self._slots
+        if first_valid > start:
+            del items[:first_valid - start]
+        return items, end
+
+    def history(self):
+        """all items still available from oldest to newest"""
+        return self.read_since(0)[0]
+
+
+class TelemetrySampler:
+    """
+    Owns a connection to NL2 and requests telemetry at a fixed rate on a
+    dedicated thread.
+
+    Received samples are published to a RingBuffer, so consumers may read the
+    latest sample or the bounded history at their own pace without delaying
+    the poll loop.
+    """
+
+    def __init__(self, tcp_ip='127.0.0.1', tcp_port=15151, rate=60,
+                 history=1024):
+        self.tcp_ip = tcp_ip
+        self.tcp_port = tcp_port
+        self.rate = rate
+        self.samples = RingBuffer(history)
+        self.error_replies = 0
+        self.overruns = 0
+        self.exception = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self.exception = None
+        self._thread = threading.Thread(
+            target=self._run, name='nl2 telemetry sampler', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def latest(self) -> Sample:
+        return self.samples.latest()
+
+    def history(self):
+        return self.samples.history()
+
+    def _run(self):
+        request = GetTelemetryMessage()
+        try:
+            with TcpTransmitter(self.tcp_ip, self.tcp_port) as nl2:
+                self._poll(nl2, request)
+        except Exception as e:
+            self.exception = e
+
+    def _poll(self, nl2, request):
+        interval = 1 / self.rate
+        next_time = time.monotonic()
+        while not self._stop.is_set():
+            nl2.send(request)
+            data = Answer.get_data(nl2.receive())
+            now = time.monotonic()
+            if isinstance(data, TelemetryData):
+                self.samples.append(Sample(now, data))
+            else:
+                self.error_replies += 1
+
+            next_time += interval
+            if next_time < now:
+                self.overruns += 1
+                next_time = now
+            else:
+                self._stop.wait(next_time - now)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
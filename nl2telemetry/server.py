@@ -0,0 +1,466 @@
+"""
+A local stand-in for the telemetry server of NL2
+
+Answers every request implemented in nl2telemetry.message.request, serves
+telemetry of a synthetic circular track or of a recorded session and allows
+to add reply latency and to split replies into several packets. This allows
+to run and measure clients without NoLimits 2.
+
+Run it with: python -m nl2telemetry.server --help
+"""
+import argparse
+import math
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+from .framing import FrameReader
+from .message import encode
+from .message.reply import data_types, OkData, ErrorData, TelemetryData, \
+    StationStateData, VersionData, IntValueData, StringData, IntValuePairData
+from .message.request import Message
+
+frame_packer = struct.Struct('!cHIH')
+int_packer = struct.Struct('!i')
+
+reply_types = {data_type: type_id for type_id, data_type in data_types.items()}
+ok_type = reply_types[OkData]
+error_type = reply_types[ErrorData]
+
+
+def encode_reply(type_id, request_id, payload=b''):
+    """builds a complete reply message"""
+    return b''.join((
+        frame_packer.pack(
+            Message.magic_start, type_id, request_id, len(payload)
+        ),
+        payload,
+        Message.magic_end,
+    ))
+
+
+class SyntheticTrack:
+    """
+    Telemetry of a train going round a flat circle at constant speed.
+    """
+
+    def __init__(self, radius=50.0, speed=20.0, height=5.0):
+        self.radius = radius
+        self.speed = speed
+        self.height = height
+
+    def payload(self, frame, frame_rate, state):
+        angle = self.speed / self.radius * frame / frame_rate
+        yaw = -angle / 2
+        return TelemetryData.packer.pack(
+            state, frame, 1, 0, 0, 0, 0, 0,
+            self.speed,
+            self.radius * math.cos(angle),
+            self.height,
+            self.radius * math.sin(angle),
+            0.0, math.sin(yaw), 0.0, math.cos(yaw),
+            self.speed ** 2 / (self.radius * 9.81), 1.0, 0.0,
+        )
+
+
+class RecordedSession:
+    """
+    Replays the telemetry of a recording, one record per rendered frame.
+    """
+
+    def __init__(self, path):
+        from .recording import RecordingReader
+
+        self.recording = RecordingReader(path)
+        if self.recording.data_type is not TelemetryData:
+            raise ValueError("{} contains no telemetry".format(path))
+        if len(self.recording) == 0:
+            raise ValueError("{} contains no records".format(path))
+
+    def payload(self, frame, frame_rate, state):
+        payload = bytearray(
+            self.recording.payload(frame % len(self.recording))
+        )
+        int_packer.pack_into(payload, 0, state)
+        int_packer.pack_into(payload, 4, frame)
+        return payload
+
+
+class Station:
+    """the simulated state of a single station"""
+
+    def __init__(self):
+        self.e_stop = False
+        self.manual_dispatch = False
+        self.gates_open = True
+        self.harness_open = True
+        self.platform_raised = True
+        self.flyer_car_locked = True
+        self.train_in_station = True
+
+    def state(self):
+        closed = not self.gates_open and not self.harness_open
+        flags = (
+            self.e_stop,
+            self.manual_dispatch,
+            self.train_in_station and closed and not self.e_stop,
+            self.gates_open,
+            not self.gates_open,
+            self.harness_open,
+            not self.harness_open,
+            not self.platform_raised,
+            self.platform_raised,
+            not self.flyer_car_locked,
+            self.flyer_car_locked,
+            self.train_in_station,
+            self.train_in_station,
+        )
+        return sum(1 << position for position, flag in enumerate(flags)
+                   if flag)
+
+
+class StandInState:
+    """
+    The simulated park shared by all connections of a StandInServer.
+    """
+
+    def __init__(self, source=None, frame_rate=60.0,
+                 coaster_names=('Stand-in Coaster',), station_count=1):
+        self.source = source if source is not None else SyntheticTrack()
+        self.frame_rate = frame_rate
+        self.coaster_names = list(coaster_names)
+        self.stations = {
+            (coaster, station): Station()
+            for coaster in range(len(self.coaster_names))
+            for station in range(station_count)
+        }
+        self.paused = False
+        self._frame_offset = 0
+        self._paused_frame = 0
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _elapsed_frames(self):
+        return int((time.monotonic() - self._start) * self.frame_rate)
+
+    def rendered_frame(self):
+        if self.paused:
+            return self._paused_frame
+        return self._elapsed_frames() - self._frame_offset
+
+    def set_paused(self, paused):
+        with self._lock:
+            if paused and not self.paused:
+                self._paused_frame = self.rendered_frame()
+                self.paused = True
+            elif not paused and self.paused:
+                self._frame_offset = \
+                    self._elapsed_frames() - self._paused_frame
+                self.paused = False
+
+    def telemetry(self):
+        state = 5 if self.paused else 1
+        return self.source.payload(
+            self.rendered_frame(), self.frame_rate, state
+        )
+
+
+class _StandInHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.state = self.server.state
+        self.reader = FrameReader()
+        self.replies = {
+            encode.idle.type_id: self._ok,
+            encode.get_version.type_id: self._version,
+            encode.get_telemetry.type_id: self._telemetry,
+            encode.get_coaster_count.type_id: self._coaster_count,
+            encode.get_coaster_name.type_id: self._coaster_name,
+            encode.get_current_coaster_and_nearest_station.type_id:
+                self._current_coaster_and_nearest_station,
+            encode.set_emergency_stop.type_id: self._set_emergency_stop,
+            encode.get_station_state.type_id: self._station_state,
+            encode.set_manual_mode.type_id:
+                self._set_station_flag('manual_dispatch'),
+            encode.dispatch.type_id: self._dispatch,
+            encode.set_gates.type_id: self._set_station_flag('gates_open'),
+            encode.set_harness.type_id:
+                self._set_station_flag('harness_open'),
+            encode.set_platform.type_id:
+                self._set_station_flag('platform_raised'),
+            encode.set_flyer_car.type_id:
+                self._set_station_flag('flyer_car_locked'),
+            encode.quit_server.type_id: self._quit,
+            encode.set_pause.type_id: self._set_pause,
+            encode.select_seat.type_id: self._ok,
+            encode.recenter_vr.type_id: self._ok,
+            encode.set_custom_view.type_id: self._ok,
+        }
+        self.quit = False
+        self.outgoing = None
+        self.sender = None
+        if self.server.latency > 0:
+            # replies are delayed from the arrival of their request, so
+            # pipelined requests wait concurrently
+            self.outgoing = queue.Queue()
+            self.sender = threading.Thread(
+                target=self._send_delayed, name='nl2 stand-in sender',
+                daemon=True
+            )
+            self.sender.start()
+        self.server._add_connection(self.request)
+
+    def finish(self):
+        if self.sender is not None:
+            self.outgoing.put(None)
+            self.sender.join()
+        self.server._remove_connection(self.request)
+
+    def handle(self):
+        while not self.quit:
+            try:
+                size = self.request.recv_into(self.reader.writable())
+            except OSError:
+                return
+            if size == 0:
+                return
+            arrival = time.monotonic()
+            self.reader.commit(size)
+            frame = self.reader.next_frame()
+            while frame is not None and not self.quit:
+                (type_id, request_id, data_size) = \
+                    Message.head_packer.unpack_from(frame, 1)
+                reply = self.replies.get(type_id, self._unknown)
+                try:
+                    message = reply(request_id, frame[9:9 + data_size])
+                except struct.error:
+                    # missing or short request data
+                    message = self._error(request_id, "invalid data")
+                if self.outgoing is None:
+                    self._send(message)
+                else:
+                    self.outgoing.put((arrival + self.server.latency, message))
+                frame = self.reader.next_frame()
+
+    def _send_delayed(self):
+        while True:
+            item = self.outgoing.get()
+            if item is None:
+                return
+            (due, message) = item
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self._send(message)
+            except OSError:
+                pass
+
+    def _send(self, message):
+        settings = self.server
+        if settings.split_size is None:
+            self.request.sendall(message)
+            return
+        view = memoryview(message)
+        for start in range(0, len(message), settings.split_size):
+            self.request.sendall(view[start:start + settings.split_size])
+            if settings.split_delay > 0:
+                time.sleep(settings.split_delay)
+
+    def _station(self, data):
+        (coaster, station) = struct.unpack_from('!ii', data)
+        return self.state.stations.get((coaster, station))
+
+    def _ok(self, request_id, data):
+        return encode_reply(ok_type, request_id)
+
+    def _error(self, request_id, text):
+        return encode_reply(error_type, request_id, text.encode('utf-8'))
+
+    def _unknown(self, request_id, data):
+        return self._error(request_id, "unknown message")
+
+    def _version(self, request_id, data):
+        return encode_reply(
+            reply_types[VersionData], request_id,
+            VersionData.packer.pack(2, 5, 6, 0)
+        )
+
+    def _telemetry(self, request_id, data):
+        return encode_reply(
+            reply_types[TelemetryData], request_id, self.state.telemetry()
+        )
+
+    def _coaster_count(self, request_id, data):
+        return encode_reply(
+            reply_types[IntValueData], request_id,
+            IntValueData.packer.pack(len(self.state.coaster_names))
+        )
+
+    def _coaster_name(self, request_id, data):
+        (index,) = struct.unpack_from('!i', data)
+        if not 0 <= index < len(self.state.coaster_names):
+            return self._error(request_id, "invalid coaster index")
+        return encode_reply(
+            reply_types[StringData], request_id,
+            self.state.coaster_names[index].encode('utf-8')
+        )
+
+    def _current_coaster_and_nearest_station(self, request_id, data):
+        return encode_reply(
+            reply_types[IntValuePairData], request_id,
+            IntValuePairData.packer.pack(0, 0)
+        )
+
+    def _set_emergency_stop(self, request_id, data):
+        (coaster, status) = struct.unpack_from('!iB', data)
+        stations = [station for key, station in self.state.stations.items()
+                    if key[0] == coaster]
+        if not stations:
+            return self._error(request_id, "invalid coaster index")
+        for station in stations:
+            station.e_stop = status != 0
+        return self._ok(request_id, data)
+
+    def _station_state(self, request_id, data):
+        station = self._station(data)
+        if station is None:
+            return self._error(request_id, "invalid station index")
+        return encode_reply(
+            reply_types[StationStateData], request_id,
+            StationStateData.packer.pack(station.state())
+        )
+
+    def _set_station_flag(self, name):
+        def set_flag(request_id, data):
+            station = self._station(data)
+            if station is None:
+                return self._error(request_id, "invalid station index")
+            (status,) = struct.unpack_from('!B', data, 8)
+            setattr(station, name, status != 0)
+            return self._ok(request_id, data)
+
+        return set_flag
+
+    def _dispatch(self, request_id, data):
+        station = self._station(data)
+        if station is None:
+            return self._error(request_id, "invalid station index")
+        if not station.state() & 4:
+            return self._error(request_id, "cannot dispatch")
+        return self._ok(request_id, data)
+
+    def _set_pause(self, request_id, data):
+        (status,) = struct.unpack_from('!B', data)
+        self.state.set_paused(status != 0)
+        return self._ok(request_id, data)
+
+    def _quit(self, request_id, data):
+        self.quit = True
+        return self._ok(request_id, data)
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    """
+    Serves the NL2 telemetry protocol on a background thread.
+
+    latency delays every reply by that many seconds after its request
+    arrived, split_size sends replies in packets of at most that many bytes
+    with split_delay seconds between them. Use port 0 to bind to a free port,
+    the bound port is available as port. stop() also closes the open
+    connections, like quitting NL2 does.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, tcp_ip='127.0.0.1', tcp_port=15151, state=None,
+                 latency=0.0, split_size=None, split_delay=0.0):
+        self.state = state if state is not None else StandInState()
+        self.latency = latency
+        self.split_size = split_size
+        self.split_delay = split_delay
+        self._thread = None
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        socketserver.ThreadingTCPServer.__init__(
+            self, (tcp_ip, tcp_port), _StandInHandler
+        )
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.serve_forever, name='nl2 stand-in server', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        with self._connections_lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _add_connection(self, connection):
+        with self._connections_lock:
+            self._connections.add(connection)
+
+    def _remove_connection(self, connection):
+        with self._connections_lock:
+            self._connections.discard(connection)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="A local stand-in for the NL2 telemetry server"
+    )
+    parser.add_argument('--ip', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=15151)
+    parser.add_argument('--recording', help="replay this recording")
+    parser.add_argument('--frame-rate', type=float, default=60.0)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="reply latency in seconds")
+    parser.add_argument('--split-size', type=int,
+                        help="send replies in packets of this many bytes")
+    parser.add_argument('--split-delay', type=float, default=0.0,
+                        help="seconds between split packets")
+    arguments = parser.parse_args()
+
+    source = None
+    if arguments.recording is not None:
+        source = RecordedSession(arguments.recording)
+    server = StandInServer(
+        arguments.ip, arguments.port,
+        StandInState(source, arguments.frame_rate),
+        arguments.latency, arguments.split_size, arguments.split_delay
+    )
+    print("NL2 stand-in serving on {}:{}".format(arguments.ip, server.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Watches the state of NL2 stations and reports changed flags only
+"""
+import time
+from collections import namedtuple
+
+from .message import encode
+from .message.request import Message
+from .message.reply import StationStateData
+from .transmitter import TcpTransmitter
+
+StationChange = namedtuple('StationChange', (
+    'coaster', 'station', 'flag', 'value', 'time'
+))
+StationChange.__doc__ = """flag (a StationStateData flag name) of station of
+coaster changed to value at time (time.monotonic)"""
+
+_flag_mask = (1 << len(StationStateData.flag_names)) - 1
+
+
+class StationWatcher:
+    """
+    Polls the StationStateData of several (coaster, station) pairs with a
+    single batch of requests and compares the raw state words with the
+    previous ones.
+
+    poll() returns a StationChange for every flag that flipped since the last
+    poll and passes each one to on_change. The first poll of a station
+    reports all of its flags. states holds the latest StationStateData per
+    pair.
+    """
+
+    def __init__(self, transmitter: TcpTransmitter, on_change=None):
+        self.transmitter = transmitter
+        self.on_change = on_change
+        self.states = {}
+        self.error_replies = 0
+        self._requests = {}
+
+    def watch(self, coaster, station):
+        self._requests[(coaster, station)] = encode.encode_get_station_state(
+            coaster, station
+        )
+
+    def unwatch(self, coaster, station):
+        self._requests.pop((coaster, station), None)
+        self.states.pop((coaster, station), None)
+
+    @property
+    def watched(self):
+        return list(self._requests)
+
+    def poll(self) -> list:
+        if not self._requests:
+            return []
+        pairs = list(self._requests)
+        replies = self.transmitter.request_batch(
+            [self._requests[pair] for pair in pairs]
+        )
+        now = time.monotonic()
+        changes = []
+        for pair, reply in zip(pairs, replies):
+            data = Message.get_data(reply)
+            if not isinstance(data, StationStateData):
+                self.error_replies += 1
+                continue
+            previous = self.states.get(pair)
+            self.states[pair] = data
+            if previous is None:
+                flipped = _flag_mask
+            else:
+                flipped = (data.state ^ previous.state) & _flag_mask
+            while flipped:
+                bit = flipped & -flipped
+                flipped ^= bit
+                changes.append(StationChange(
+                    pair[0], pair[1],
+                    StationStateData.flag_names[bit.bit_length() - 1],
+                    data.state & bit > 0, now
+                ))
+        if self.on_change is not None:
+            for change in changes:
+                self.on_change(change)
+        return changes
@@ -0,0 +1,222 @@
+"""
+Low overhead statistics of the messages exchanged with NL2
+"""
+import bisect
+import threading
+
+from . import message
+from .message.request import Message, Request
+
+
+def log_bounds(lowest=1e-7, highest=10.0, per_decade=10):
+    """logarithmically spaced bucket bounds from lowest to highest"""
+    bounds = []
+    value = lowest
+    factor = 10 ** (1 / per_decade)
+    while value < highest * (1 + 1e-9):
+        bounds.append(value)
+        value *= factor
+    return tuple(bounds)
+
+
+default_bounds = log_bounds()
+
+
+class Histogram:
+    """
+    Counts values in fixed buckets, bucket i counts the values up to
+    bounds[i], the last bucket everything above.
+    """
+
+    def __init__(self, bounds=default_bounds):
+        self.bounds = bounds
+        self.reset()
+
+    def reset(self):
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """the upper bound of the bucket containing the percentile"""
+        if self.count == 0:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count > 0:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                return self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': [(bound, count) for bound, count
+                        in zip(self.bounds + (None,), self.buckets) if count],
+        }
+
+
+class MessageStats:
+    """the statistics of a single request type"""
+
+    def __init__(self, bounds=default_bounds):
+        self.round_trip = Histogram(bounds)
+        self.decode = Histogram(bounds)
+        self.requests = 0
+        self.replies = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.error_replies = 0
+        self.last_error = None
+
+    def snapshot(self):
+        return {
+            'requests': self.requests,
+            'replies': self.replies,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'error_replies': self.error_replies,
+            'last_error': self.last_error,
+            'round_trip': self.round_trip.snapshot(),
+            'decode': self.decode.snapshot(),
+        }
+
+
+request_names = {
+    msg.type_id: msg.type_name for msg in vars(message).values()
+    if isinstance(msg, Request)
+}
+
+
+class TransmitterStats:
+    """
+    Records round trip times, decode times, transferred bytes and error
+    replies per request type. Assign an instance to TcpTransmitter.stats to
+    enable it.
+
+    Replies are matched to requests by their request id, so requests that
+    are in flight at the same time need distinct request ids.
+    """
+    error_type = 2
+    max_pending = 4096
+
+    def __init__(self, bounds=default_bounds):
+        self.bounds = bounds
+        self._types = {}
+        self._pending = {}
+        self._last_reply = (None, None)
+        self._lock = threading.Lock()
+
+    def _get(self, type_id) -> MessageStats:
+        stats = self._types.get(type_id)
+        if stats is None:
+            with self._lock:
+                stats = self._types.setdefault(
+                    type_id, MessageStats(self.bounds)
+                )
+        return stats
+
+    def sent(self, buffer, now):
+        (type_id, request_id, _) = Message.head_packer.unpack_from(buffer, 1)
+        stats = self._get(type_id)
+        stats.requests += 1
+        stats.bytes_sent += len(buffer)
+        if len(self._pending) >= self.max_pending:
+            # replies that never arrived
+            self._pending.clear()
+        self._pending[request_id] = (type_id, now)
+
+    def received(self, frame, now):
+        (reply_type, request_id, data_size) = \
+            Message.head_packer.unpack_from(frame, 1)
+        pending = self._pending.pop(request_id, None)
+        if pending is None:
+            return
+        (type_id, sent) = pending
+        stats = self._get(type_id)
+        stats.replies += 1
+        stats.bytes_received += len(frame)
+        stats.round_trip.add(now - sent)
+        self._last_reply = (request_id, type_id)
+        if reply_type == self.error_type:
+            stats.error_replies += 1
+            stats.last_error = str(frame[9:9 + data_size], 'utf-8')
+
+    def decoded(self, msg, seconds):
+        """records the decode time of the last received reply"""
+        (request_id, type_id) = self._last_reply
+        if request_id == msg.request_id:
+            self._get(type_id).decode.add(seconds)
+
+    def snapshot(self, reset=False):
+        """the statistics per request type name, optionally starting new
+        statistics afterwards"""
+        with self._lock:
+            types = self._types
+            if reset:
+                self._types = {}
+        return {
+            request_names.get(type_id, str(type_id)): stats.snapshot()
+            for type_id, stats in sorted(types.items())
+        }
+
+    def reset(self):
+        self.snapshot(reset=True)
+
+
+class StatsReporter:
+    """
+    Passes a snapshot of stats to report every interval seconds on a
+    background thread and resets the statistics.
+    """
+
+    def __init__(self, stats: TransmitterStats, interval=10.0, report=print):
+        self.stats = stats
+        self.interval = interval
+        self.report = report
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='nl2 stats reporter', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.report(self.stats.snapshot(reset=True))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
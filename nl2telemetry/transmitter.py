@@ -1,33 +1,170 @@
 import socket
+import struct
+import threading
+import time
 import binascii
+from collections import namedtuple
+
+from .framing import FrameReader
+from .message.request import Message
+
+
+def _buffer_of(msg):
+    """the bytes of a request message or of an already encoded request"""
+    if isinstance(msg, (bytes, bytearray, memoryview)):
+        return msg
+    return msg.buffer
 
 
 class TcpTransmitter:
     """
     A simple wrapper around a socket for connecting with the telemetry server
     of NL2.
+
+    Assign a nl2telemetry.stats.TransmitterStats to stats to record round
+    trip times, transferred bytes and error replies.
+
+    Nagle's algorithm is disabled unless nodelay is False, since requests are
+    tiny and each one waits for its reply. timeout applies to connecting and
+    receiving, sndbuf and rcvbuf set the socket buffer sizes when given.
     """
+    request_id_packer = struct.Struct('!I')
+    max_batch_buffers = 1024
 
-    def __init__(self, tcp_ip='127.0.0.1', tcp_port=15151):
+    def __init__(self, tcp_ip='127.0.0.1', tcp_port=15151,
+                 receive_buffer_size=4096, stats=None, timeout=3,
+                 nodelay=True, sndbuf=None, rcvbuf=None):
         self.tcp_ip = tcp_ip
         self.tcp_port = tcp_port
+        self.stats = stats
+        self.timeout = timeout
+        self.nodelay = nodelay
+        self.sndbuf = sndbuf
+        self.rcvbuf = rcvbuf
+        self.stale_replies = 0
+        self._next_request_id = 1
+        self._reader = FrameReader(receive_buffer_size)
 
     def connect(self):
         ip_port_msg = "{}:{}".format(self.tcp_ip, self.tcp_port)
         print("NL2 transmitter connecting to", ip_port_msg)
+        self._open_socket()
 
+    def _open_socket(self):
         self.sck = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sck.settimeout(3)
+        self.sck.settimeout(self.timeout)
+        if self.nodelay:
+            self.sck.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.sndbuf is not None:
+            self.sck.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF,
+                                self.sndbuf)
+        if self.rcvbuf is not None:
+            self.sck.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                                self.rcvbuf)
+        self._reader.clear()
         try:
             self.sck.connect((self.tcp_ip, self.tcp_port))
         except Exception as e:
             raise e
 
+    def _stamp(self, msg):
+        """a copy of msg with a fresh request id as (request_id, buffer)"""
+        request_id = self._next_request_id
+        # 0 is the default request id of message instances, so replies to
+        # them are never taken for replies to stamped requests
+        self._next_request_id = (request_id + 1) & 0xFFFFFFFF or 1
+        buffer = bytearray(_buffer_of(msg))
+        self.request_id_packer.pack_into(buffer, 3, request_id)
+        return request_id, buffer
+
     def send(self, msg):
-        self.sck.send(msg.buffer)
+        """sends a request message or an already encoded request (see
+        nl2telemetry.message.encode)"""
+        msg = _buffer_of(msg)
+        if self.stats is not None:
+            self.stats.sent(msg, time.perf_counter())
+        self.sck.sendall(msg)
+
+    def send_batch(self, msgs):
+        """sends several requests or encoded requests with as few system
+        calls as possible"""
+        buffers = [_buffer_of(msg) for msg in msgs]
+        if self.stats is not None:
+            now = time.perf_counter()
+            for buffer in buffers:
+                self.stats.sent(buffer, now)
+        self._send_buffers(buffers)
+
+    def request_batch(self, msgs) -> list:
+        """
+        Sends several requests at once and returns copies of their replies in
+        the order of msgs.
+
+        Every request is sent with a unique request id, replies to earlier
+        requests are skipped.
+        """
+        buffers = []
+        pending = {}
+        for msg in msgs:
+            (request_id, buffer) = self._stamp(msg)
+            pending[request_id] = len(buffers)
+            buffers.append(buffer)
+        self.send_batch(buffers)
+
+        replies = [None] * len(buffers)
+        while pending:
+            frame = self.receive()
+            (_, reply_id, _) = Message.head_packer.unpack_from(frame, 1)
+            index = pending.pop(reply_id, None)
+            if index is None:
+                self.stale_replies += 1
+            else:
+                replies[index] = bytes(frame)
+        return replies
+
+    def _send_buffers(self, buffers):
+        if not hasattr(self.sck, 'sendmsg'):
+            # Windows
+            self.sck.sendall(b''.join(buffers))
+            return
+        views = [memoryview(buffer).cast('B') for buffer in buffers]
+        while views:
+            sent = self.sck.sendmsg(views[:self.max_batch_buffers])
+            # drop what has been sent, keep the rest of a partial send
+            while views and sent >= len(views[0]):
+                sent -= len(views[0])
+                del views[0]
+            if sent:
+                views[0] = views[0][sent:]
 
-    def receive(self, buffer_size=100):
-        return self.sck.recv(buffer_size)
+    def receive(self):
+        """
+        Returns exactly one complete message.
+
+        The returned memoryview refers to the reusable receive buffer and is
+        only valid until the next call of receive().
+        """
+        frame = self._reader.next_frame()
+        while frame is None:
+            size = self.sck.recv_into(self._reader.writable())
+            if size == 0:
+                raise ConnectionError("connection closed by NL2")
+            self._reader.commit(size)
+            frame = self._reader.next_frame()
+        if self.stats is not None:
+            self.stats.received(frame, time.perf_counter())
+        return frame
+
+    def receive_message(self) -> Message:
+        """receives and decodes one message, see receive()"""
+        frame = self.receive()
+        if self.stats is None:
+            return Message.build(frame)
+        start = time.perf_counter()
+        msg = Message.build(frame)
+        if msg is not None:
+            self.stats.decoded(msg, time.perf_counter() - start)
+        return msg
 
     def close(self):
         self.sck.close()
@@ -39,3 +176,151 @@ class TcpTransmitter:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
+
+
+class ThreadSafeTcpTransmitter(TcpTransmitter):
+    """
+    A TcpTransmitter that may be shared by several threads.
+
+    request() sends a request and receives its reply while holding a lock, so
+    every caller gets the reply to its own request. Each request is sent with
+    a unique request id, replies to earlier requests (e.g. after a timeout)
+    are skipped. Requests should be built with nl2telemetry.message.encode,
+    shared message instances are only copied once the lock is held.
+    """
+
+    def __init__(self, tcp_ip='127.0.0.1', tcp_port=15151,
+                 receive_buffer_size=4096, stats=None, **options):
+        TcpTransmitter.__init__(
+            self, tcp_ip, tcp_port, receive_buffer_size, stats, **options
+        )
+        self._lock = threading.Lock()
+
+    def request(self, msg) -> bytes:
+        """sends msg and returns a copy of its reply"""
+        with self._lock:
+            (request_id, buffer) = self._stamp(msg)
+            self.send(buffer)
+            while True:
+                frame = self.receive()
+                (_, reply_id, _) = Message.head_packer.unpack_from(frame, 1)
+                if reply_id == request_id:
+                    return bytes(frame)
+                self.stale_replies += 1
+
+    def request_batch(self, msgs) -> list:
+        with self._lock:
+            return TcpTransmitter.request_batch(self, msgs)
+
+
+Gap = namedtuple('Gap', (
+    'started', 'ended', 'attempts', 'last_rendered_frame'
+))
+Gap.__doc__ = """A period (time.monotonic) without connection to NL2,
+last_rendered_frame is the frame of the last telemetry received before"""
+
+
+class ReconnectingTcpTransmitter(TcpTransmitter):
+    """
+    A TcpTransmitter that survives restarts of NL2.
+
+    Connecting is retried with exponential backoff (initial_backoff seconds,
+    multiplied by backoff_factor up to max_backoff) until it succeeds or
+    max_attempts failed. A failing send() or receive() reconnects and sends
+    the last request again, so callers that wait for the reply of each
+    request do not notice the interruption. Pipelined requests except the
+    last one or the last batch are lost. A reply that takes longer than
+    timeout, e.g. while NL2 loads a park, raises socket.timeout like in
+    TcpTransmitter and keeps the connection.
+
+    Every interruption is appended to gaps and passed to on_gap, together
+    with the rendered frame of the last telemetry received before it.
+    """
+
+    telemetry_type = 6
+    frame_packer = struct.Struct('!i')
+
+    def __init__(self, tcp_ip='127.0.0.1', tcp_port=15151,
+                 receive_buffer_size=4096, stats=None, initial_backoff=0.5,
+                 backoff_factor=2.0, max_backoff=30.0, max_attempts=None,
+                 on_gap=None, **options):
+        TcpTransmitter.__init__(
+            self, tcp_ip, tcp_port, receive_buffer_size, stats, **options
+        )
+        self.initial_backoff = initial_backoff
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.on_gap = on_gap
+        self.gaps = []
+        self.last_rendered_frame = None
+        self._last_request = None
+
+    def connect(self):
+        ip_port_msg = "{}:{}".format(self.tcp_ip, self.tcp_port)
+        print("NL2 transmitter connecting to", ip_port_msg)
+        backoff = self.initial_backoff
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                self._open_socket()
+                return attempts
+            except OSError:
+                self.sck.close()
+                if self.max_attempts is not None and \
+                        attempts >= self.max_attempts:
+                    raise
+            time.sleep(backoff)
+            backoff = min(backoff * self.backoff_factor, self.max_backoff)
+
+    def reconnect(self):
+        started = time.monotonic()
+        self.sck.close()
+        attempts = self.connect()
+        gap = Gap(started, time.monotonic(), attempts,
+                  self.last_rendered_frame)
+        self.gaps.append(gap)
+        if self.on_gap is not None:
+            self.on_gap(gap)
+
+    def send(self, msg):
+        self._last_request = bytes(_buffer_of(msg))
+        try:
+            TcpTransmitter.send(self, self._last_request)
+        except OSError:
+            self._resend()
+
+    def _send_buffers(self, buffers):
+        # a batch is resent as a whole
+        self._last_request = b''.join(buffers)
+        try:
+            TcpTransmitter._send_buffers(self, buffers)
+        except OSError:
+            self._resend()
+
+    def receive(self):
+        while True:
+            try:
+                frame = TcpTransmitter.receive(self)
+                break
+            except socket.timeout:
+                raise
+            except OSError:
+                self._resend()
+        if frame[2] == self.telemetry_type and frame[1] == 0:
+            (self.last_rendered_frame,) = self.frame_packer.unpack_from(
+                frame, 13
+            )
+        return frame
+
+    def _resend(self):
+        while True:
+            self.reconnect()
+            if self._last_request is None:
+                return
+            try:
+                TcpTransmitter.send(self, self._last_request)
+                return
+            except OSError:
+                pass
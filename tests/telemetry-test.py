@@ -2,8 +2,12 @@
 A simple test of the telemetry client components.
 
 No automatic testing framework is involved since NL2 must be put into suitable
-states manually anyway.
+states manually anyway. Pass --standin to test against the local stand-in
+server of nl2telemetry.server instead of NL2.
 """
+import sys
+
+import nl2telemetry.server
 import nl2telemetry.transmitter
 import nl2telemetry.message as message
 import binascii
@@ -28,7 +32,7 @@ def print_msg_data(msg):
             pass
         else:
             print("  data:")
-            for key, value in data.__dict__.items():
+            for key, value in data._asdict().items():
                 print("  ", key, value)
 
 
@@ -81,7 +85,11 @@ def test_all(ip, port, test_server_quitting=False):
 
 def main():
     try:
-        test_all(IP, PORT)
+        if '--standin' in sys.argv:
+            with nl2telemetry.server.StandInServer(IP, 0) as server:
+                test_all(IP, server.port, test_server_quitting=True)
+        else:
+            test_all(IP, PORT)
     except Exception as e:
         print(e)
 